@@ -0,0 +1,67 @@
+"""
+Compares memory use and aggregate latency of ExpenseTracker (list of
+dataclasses) against ColumnarExpenseTracker.
+
+    python -m benchmarks.compare_trackers --rows 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_expenses
+from src import columnar
+from src.columnar import ColumnarExpenseTracker
+from src.tracker import ExpenseTracker
+
+
+AGGREGATES = [
+    "total_expense",
+    "total_by_category",
+    "highest_and_lowest_category",
+    "trend_by_date",
+    "total_by_month",
+]
+
+
+def measure(tracker_cls, rows: int, seed: int, repeat: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    # Expenses are generated inside the measurement so the list tracker is
+    # charged for its Expense objects, while the columnar one only keeps arrays.
+    tracker = tracker_cls(generate_expenses(rows, seed=seed))
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = {}
+    for name in AGGREGATES:
+        method = getattr(tracker, name)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            method()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    return {"retained_bytes": retained, "aggregate_seconds": timings}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {
+        "rows": args.rows,
+        "numpy": columnar.np is not None,
+        "list": measure(ExpenseTracker, args.rows, args.seed, args.repeat),
+        "columnar": measure(ColumnarExpenseTracker, args.rows, args.seed, args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
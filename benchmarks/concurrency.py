@@ -0,0 +1,251 @@
+"""
+Compares serving modes under concurrent load: gunicorn sync workers (the
+Procfile) against the ASGI mode (uvicorn src.asgi:app), on the same
+synthetic database.
+
+    python -m benchmarks.concurrency --rows 10000 --connections 32 --duration 10
+    python -m benchmarks.concurrency --sync-workers 2 --asgi-threads 8
+
+Each client connection requests a mix of the dashboard and read API routes
+in a loop, one request per connection (`Connection: close`, as the sync
+workers do not keep connections alive). The report gives requests/second,
+latency percentiles, non-200 answers and the servers' total resident
+memory (Linux /proc), so runs can be compared at equal memory. The
+default of one sync worker is what the Procfile runs.
+
+`--slow-clients N` adds N more connections that pause for `--slow-pause`
+seconds halfway through sending each request, like clients on a poor
+network. They are background load: only the other clients are measured.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.startup import ROOT, flask, write_csv
+
+
+PATHS = [
+    "/",
+    "/api/summary",
+    "/api/categories",
+    "/api/trend/daily",
+    "/api/expenses?limit=25",
+    "/api/expenses?q=food&limit=25",
+    "/?category=Food&from=2025-01-01",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(mode: str, port: int, sync_workers: int) -> List[str]:
+    if mode == "sync":
+        return [
+            sys.executable, "-m", "gunicorn", "--workers", str(sync_workers),
+            "--bind", f"127.0.0.1:{port}", "src.web_app:app",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "--port", str(port), "--log-level", "warning",
+        "src.asgi:app",
+    ]
+
+
+def process_tree_rss(pid: int) -> int:
+    """Resident bytes of `pid` and all its descendants."""
+    parents: Dict[int, int] = {}
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                # The ppid is the 2nd field after the parenthesised command name.
+                stat = (entry / "stat").read_text()
+            except OSError:
+                continue
+            parents[int(entry.name)] = int(stat.rsplit(")", 1)[1].split()[1])
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [child for child, ppid in parents.items() if ppid == parent]
+        tree.update(children)
+        frontier.extend(children)
+    total = 0
+    for member in tree:
+        try:
+            for line in Path(f"/proc/{member}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+async def fetch(port: int, path: str, pause: float = 0.0) -> int:
+    request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        if pause:
+            writer.write(request[:20])
+            await writer.drain()
+            await asyncio.sleep(pause)
+            request = request[20:]
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def wait_until_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if await fetch(port, "/api/summary") == 200:
+                return
+        except (OSError, IndexError, ValueError):
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"server on port {port} did not start")
+        await asyncio.sleep(0.1)
+
+
+async def load(
+    port: int,
+    connections: int,
+    duration: float,
+    warmup: float,
+    slow_clients: int = 0,
+    slow_pause: float = 0.0,
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop = measure_from + duration
+
+    async def client(index: int, pause: float = 0.0) -> None:
+        nonlocal errors
+        i = index
+        while True:
+            began = time.perf_counter()
+            if began >= stop:
+                return
+            try:
+                status = await fetch(port, PATHS[i % len(PATHS)], pause)
+            except (OSError, IndexError, ValueError):
+                status = 0
+            finished = time.perf_counter()
+            if began >= measure_from and not pause:
+                latencies.append(finished - began)
+                if status != 200:
+                    errors += 1
+            i += 1
+
+    await asyncio.gather(
+        *(client(i) for i in range(connections)),
+        *(client(i, slow_pause) for i in range(slow_clients)),
+    )
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / duration,
+        "errors": errors,
+        "latency_ms": {
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": latencies[-1] * 1000,
+            "mean": statistics.fmean(latencies) * 1000,
+        },
+    }
+
+
+def run_mode(mode: str, env: Dict[str, str], args: argparse.Namespace) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        server_command(mode, port, args.sync_workers),
+        env=env,
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_until_ready(port))
+        result = asyncio.run(
+            load(
+                port,
+                args.connections,
+                args.duration,
+                args.warmup,
+                args.slow_clients,
+                args.slow_pause,
+            )
+        )
+        result["rss_mb"] = process_tree_rss(server.pid) / 2**20
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per mode")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds first")
+    parser.add_argument("--slow-clients", type=int, default=0)
+    parser.add_argument("--slow-pause", type=float, default=0.2)
+    parser.add_argument("--sync-workers", type=int, default=1)
+    parser.add_argument("--asgi-threads", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=["sync", "asgi"], default=["sync", "asgi"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        data_dir.mkdir()
+        csv_path = data_dir / "expenses.csv"
+        write_csv(csv_path, args.rows, args.seed)
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(ROOT),
+            "EXPENSE_TRACKER_DATA_FILE": str(csv_path),
+            "EXPENSE_TRACKER_ASGI_THREADS": str(args.asgi_threads),
+        }
+        flask(env, "init-db")
+        results = {mode: run_mode(mode, env, args) for mode in args.modes}
+
+    config = {
+        key: getattr(args, key)
+        for key in (
+            "rows",
+            "connections",
+            "duration",
+            "slow_clients",
+            "slow_pause",
+            "sync_workers",
+            "asgi_threads",
+        )
+    }
+    print(json.dumps({"config": config, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Measures cold-start time of the web app: importing it and serving the first
+request, each in a fresh interpreter.
+
+    python -m benchmarks.startup --rows 10000 --repeat 5 [--gap 0.1]
+
+`--gap` waits that many seconds between import and the first request (not
+counted), like the time a real server spends binding before traffic arrives;
+it is what gives the fast mode's background warm-up a chance to finish.
+
+Modes:
+  cold      database created and seeded from the CSV by the first request
+  prepared  database set up beforehand with `flask init-db`
+  fast      prepared, plus compiled templates and EXPENSE_TRACKER_FAST_START=1
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.synthetic import iter_expenses
+from src import storage
+from src.models import format_cents
+
+
+ROOT = Path(__file__).resolve().parent.parent
+MODES = ["cold", "prepared", "fast"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from src import web_app
+imported = time.perf_counter()
+time.sleep(float(sys.argv[1]))
+imported += float(sys.argv[1])
+response = web_app.app.test_client().get("/")
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({"import": imported - start, "first_request": served - imported}))
+"""
+
+
+def write_csv(csv_path: Path, rows: int, seed: int) -> None:
+    with csv_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(storage.CSV_FIELDNAMES)
+        for e in iter_expenses(rows, seed=seed):
+            writer.writerow([e.id, e.date.isoformat(), e.category, e.description, format_cents(e.cents)])
+
+
+def prepare(mode: str, workdir: Path, source_csv: Path) -> Dict[str, str]:
+    """Lays out a data directory for one run of `mode`; returns its environment."""
+    data_dir = workdir / "data"
+    data_dir.mkdir()
+    csv_path = data_dir / "expenses.csv"
+    csv_path.write_bytes(source_csv.read_bytes())
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "EXPENSE_TRACKER_DATA_FILE": str(csv_path),
+        "EXPENSE_TRACKER_COMPILED_TEMPLATES": str(workdir / "templates"),
+    }
+    env.pop("EXPENSE_TRACKER_FAST_START", None)
+    if mode in ("prepared", "fast"):
+        flask(env, "init-db")
+    if mode == "fast":
+        flask(env, "compile-templates")
+        env["EXPENSE_TRACKER_FAST_START"] = "1"
+    return env
+
+
+def flask(env: Dict[str, str], command: str) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "src.web_app", command],
+        env=env,
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+    )
+
+
+def run(rows: int, seed: int, repeat: int, gap: float = 0.0) -> dict:
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source_csv = Path(tmp) / "source.csv"
+        write_csv(source_csv, rows, seed)
+        for mode in MODES:
+            samples: Dict[str, List[float]] = {"import": [], "first_request": [], "total": []}
+            for i in range(repeat):
+                workdir = Path(tmp) / f"{mode}-{i}"
+                workdir.mkdir()
+                env = prepare(mode, workdir, source_csv)
+                output = subprocess.run(
+                    [sys.executable, "-c", CHILD, str(gap)],
+                    env=env,
+                    cwd=ROOT,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                timing = json.loads(output.strip().splitlines()[-1])
+                samples["import"].append(timing["import"])
+                samples["first_request"].append(timing["first_request"])
+                samples["total"].append(timing["import"] + timing["first_request"])
+            results[mode] = {name: statistics.median(values) for name, values in samples.items()}
+    return {"rows": rows, "repeat": repeat, "gap": gap, "median_seconds": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--gap", type=float, default=0.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.seed, args.repeat, args.gap), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Times storage, tracker aggregates and Flask routes against synthetic data.
+
+    python -m benchmarks.suite run --rows 10000 100000 --output bench.json
+    python -m benchmarks.suite compare baseline.json bench.json --threshold 1.2
+
+`run` prints (or writes) JSON keyed by "<rows>/<case>" with the best and
+median wall time of each case. `compare` reports the ratio of every shared
+case and exits with status 1 when any got slower than the threshold allows.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic import generate_expenses
+from src import analytics, storage, web_app
+from src.columnar import ColumnarExpenseTracker
+from src.tracker import ExpenseTracker
+
+
+TRACKER_AGGREGATES = [
+    "total_expense",
+    "total_by_category",
+    "highest_and_lowest_category",
+    "trend_by_date",
+    "total_by_month",
+]
+
+
+def time_call(
+    fn: Callable[[int], object], repeat: int, after: Callable[[], object] | None = None
+) -> Dict[str, float]:
+    """
+    Calls fn(i) `repeat` times and returns the best and median duration.
+    `after` runs between calls, outside the timed region (e.g. to flush
+    background work a write has scheduled).
+    """
+    durations: List[float] = []
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn(i)
+        durations.append(time.perf_counter() - start)
+        if after is not None:
+            after()
+    return {"best": min(durations), "median": statistics.median(durations)}
+
+
+def bench_storage(path: str, expenses, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {
+        "storage.save_expenses": time_call(
+            lambda _: storage.save_expenses(path, expenses), repeat, storage.flush_csv_exports
+        ),
+        "storage.load_expenses": time_call(lambda _: storage.load_expenses(path), repeat),
+        "storage.iter_expense_rows": time_call(lambda _: list(storage.iter_expense_rows(path)), repeat),
+        "storage.search_expenses": time_call(
+            lambda _: storage.search_expenses(path, expenses[0].description, 25), repeat
+        ),
+        "columnar.from_rows": time_call(
+            lambda _: ColumnarExpenseTracker.from_rows(storage.iter_expense_rows(path)), repeat
+        ),
+    }
+    columns = ColumnarExpenseTracker.from_rows(storage.iter_expense_rows(path))
+    results["analytics.analyze"] = time_call(lambda _: analytics.analyze(columns), repeat)
+    return results
+
+
+def bench_tracker(expenses, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {"tracker.build": time_call(lambda _: ExpenseTracker(expenses), repeat)}
+    tracker = ExpenseTracker(expenses)
+    for name in TRACKER_AGGREGATES:
+        method = getattr(tracker, name)
+        results[f"tracker.{name}"] = time_call(lambda _: method(), repeat)
+    return results
+
+
+def bench_routes(path: str, expenses, repeat: int) -> Dict[str, Dict[str, float]]:
+    web_app.DATA_FILE = Path(path)
+    web_app.app.config["TESTING"] = True
+    client = web_app.app.test_client()
+    edit_id = expenses[0].id
+    # Every delete needs an expense of its own.
+    delete_ids = [e.id for e in expenses[1 : repeat + 1]]
+
+    def get(url: str) -> None:
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+
+    def post(url: str, data: dict | None = None) -> None:
+        response = client.post(url, data=data or {})
+        assert response.status_code == 302, (url, response.status_code)
+
+    form = {
+        "date": date(2025, 6, 1).isoformat(),
+        "category": "Food",
+        "amount": "12.34",
+        "description": "benchmark",
+    }
+    flush = storage.flush_csv_exports
+    return {
+        "route.get_index": time_call(lambda _: get("/"), repeat),
+        "route.post_index": time_call(lambda _: post("/", form), repeat, flush),
+        "route.get_edit": time_call(lambda _: get(f"/expense/{edit_id}/edit"), repeat),
+        "route.post_edit": time_call(
+            lambda _: post(f"/expense/{edit_id}/edit", form), repeat, flush
+        ),
+        "route.post_delete": time_call(
+            lambda i: post(f"/expense/{delete_ids[i]}/delete"), repeat, flush
+        ),
+    }
+
+
+def run(rows: List[int], seed: int, repeat: int) -> dict:
+    results: Dict[str, Dict[str, float]] = {}
+    original_data_file = web_app.DATA_FILE
+    try:
+        for count in rows:
+            expenses = generate_expenses(count, seed=seed)
+            with tempfile.TemporaryDirectory() as tmp:
+                path = str(Path(tmp) / "expenses.csv")
+                cases = {}
+                cases.update(bench_storage(path, expenses, repeat))
+                cases.update(bench_tracker(expenses, repeat))
+                cases.update(bench_routes(path, expenses, repeat))
+                storage.close_connections()
+            for name, timing in cases.items():
+                results[f"{count}/{name}"] = timing
+    finally:
+        web_app.DATA_FILE = original_data_file
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "rows": rows,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """
+    Returns one entry per case present in both runs, comparing best times.
+    `regressed` is set when current/baseline exceeds `threshold`.
+    """
+    rows = []
+    for name in sorted(baseline["results"].keys() & current["results"].keys()):
+        before = baseline["results"][name]["best"]
+        after = current["results"][name]["best"]
+        ratio = after / before if before else float("inf")
+        rows.append(
+            {
+                "case": name,
+                "baseline": before,
+                "current": after,
+                "ratio": ratio,
+                "regressed": ratio > threshold,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="write the JSON here instead of stdout")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=1.2, help="slowdown ratio counted as a regression"
+    )
+    args = parser.parse_args()
+
+    if args.command == "run":
+        output = json.dumps(run(args.rows, args.seed, args.repeat), indent=2)
+        if args.output:
+            Path(args.output).write_text(output + "\n", encoding="utf-8")
+        else:
+            print(output)
+        return
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    rows = compare(baseline, current, args.threshold)
+    print(json.dumps(rows, indent=2))
+    regressions = [row["case"] for row in rows if row["regressed"]]
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import random
+from datetime import date, timedelta
+from typing import Iterator, List
+
+from src.models import Expense
+
+
+# (category, relative frequency, median amount, spread) - lognormal amounts,
+# so most expenses are small with a long tail of large ones.
+CATEGORY_PROFILES = [
+    ("Food", 40, 18.0, 0.8),
+    ("Transportation", 18, 25.0, 0.7),
+    ("Entertainment", 12, 35.0, 0.9),
+    ("Utilities", 6, 90.0, 0.4),
+    ("Health", 6, 60.0, 1.0),
+    ("Travel", 4, 250.0, 1.1),
+    ("Housing", 3, 1500.0, 0.2),
+    ("Other", 11, 30.0, 1.2),
+]
+
+
+def iter_expenses(count: int, *, seed: int = 0, end: date | None = None, years: int = 5) -> Iterator[Expense]:
+    """
+    Yields `count` reproducible expenses spread over the `years` before `end`.
+    Weekends are busier than weekdays and recent months busier than old ones.
+    """
+    rng = random.Random(seed)
+    end = end or date(2025, 12, 31)
+    span = 365 * years
+    names = [p[0] for p in CATEGORY_PROFILES]
+    weights = [p[1] for p in CATEGORY_PROFILES]
+    profiles = {p[0]: p for p in CATEGORY_PROFILES}
+
+    for i in range(count):
+        # Triangular skew towards recent dates.
+        day = end - timedelta(days=int(rng.triangular(0, span, 0)))
+        if day.weekday() < 5 and rng.random() < 0.25:
+            day += timedelta(days=5 - day.weekday())
+            day = min(day, end)
+        category = rng.choices(names, weights)[0]
+        _, _, median, spread = profiles[category]
+        amount = round(max(0.01, rng.lognormvariate(0, spread) * median), 2)
+        yield Expense(
+            date=day,
+            category=category,
+            amount=amount,
+            description=f"{category} #{i}",
+            id=f"{seed:04x}{i:012x}",
+        )
+
+
+def generate_expenses(count: int, *, seed: int = 0, end: date | None = None, years: int = 5) -> List[Expense]:
+    return list(iter_expenses(count, seed=seed, end=end, years=years))
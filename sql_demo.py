@@ -14,12 +14,20 @@ def main() -> None:
 
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(expenses)")}
+    if "amount_cents" not in columns:
+        conn.close()
+        print(
+            f"{db_path} still uses the old REAL amount column. Migrate it first with:\n"
+            "    python -m flask --app src.web_app init-db"
+        )
+        return
 
     queries = [
         (
             "Total spend by category",
             """
-            SELECT category, SUM(amount) AS total
+            SELECT category, SUM(amount_cents) / 100.0 AS total
             FROM expenses
             GROUP BY category
             ORDER BY total DESC;
@@ -28,7 +36,7 @@ def main() -> None:
         (
             "Highest spending category",
             """
-            SELECT category, SUM(amount) AS total
+            SELECT category, SUM(amount_cents) / 100.0 AS total
             FROM expenses
             GROUP BY category
             ORDER BY total DESC
@@ -38,7 +46,7 @@ def main() -> None:
         (
             "Daily spend trend",
             """
-            SELECT date, SUM(amount) AS total
+            SELECT date, SUM(amount_cents) / 100.0 AS total
             FROM expenses
             GROUP BY date
             ORDER BY date;
@@ -47,7 +55,7 @@ def main() -> None:
         (
             "Monthly spend trend (YYYY-MM)",
             """
-            SELECT substr(date, 1, 7) AS month, SUM(amount) AS total
+            SELECT substr(date, 1, 7) AS month, SUM(amount_cents) / 100.0 AS total
             FROM expenses
             GROUP BY month
             ORDER BY month;
@@ -65,7 +73,7 @@ def main() -> None:
         (
             "Average expense amount",
             """
-            SELECT AVG(amount) AS avg_amount
+            SELECT AVG(amount_cents) / 100.0 AS avg_amount
             FROM expenses;
             """,
         ),
@@ -74,14 +82,14 @@ def main() -> None:
             """
             SELECT *
             FROM expenses
-            ORDER BY amount DESC
+            ORDER BY amount_cents DESC
             LIMIT 5;
             """,
         ),
         (
             "Total spend per category for a specific month (example)",
             """
-            SELECT category, SUM(amount) AS total
+            SELECT category, SUM(amount_cents) / 100.0 AS total
             FROM expenses
             WHERE substr(date, 1, 7) = '2025-01'
             GROUP BY category
@@ -100,7 +108,7 @@ def main() -> None:
         (
             "Categories with total spend > 500",
             """
-            SELECT category, SUM(amount) AS total
+            SELECT category, SUM(amount_cents) / 100.0 AS total
             FROM expenses
             GROUP BY category
             HAVING total > 500
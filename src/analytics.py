@@ -0,0 +1,238 @@
+"""
+Spending analytics over a columnar snapshot of the expenses:
+- trailing 7- and 30-day average daily spend;
+- per-category median and p90 amounts;
+- month-over-month changes;
+- expenses that are outliers within their category.
+
+    tracker = ColumnarExpenseTracker.from_rows(storage.iter_expense_rows(path))
+    report = analyze(tracker, processes=4)
+
+The per-expense work (daily totals, per-category sorting and quantiles,
+outlier flags) is one group-by pass over the tracker's arrays. It is
+vectorised with NumPy when NumPy is installed, and the stdlib path gives
+exactly the same numbers. The per-day work (rolling windows, months) is
+O(days), not O(expenses). With `processes`, the per-category quantiles are
+spread over a process pool, one category per task.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from itertools import accumulate
+from typing import Dict, List, Sequence, Tuple
+
+from . import columnar
+from .columnar import ColumnarExpenseTracker
+from .models import ExpenseFilter, from_cents
+from .tracker import _month_key
+
+
+ROLLING_WINDOWS = (7, 30)
+QUANTILES = (0.25, 0.5, 0.75, 0.9)
+# Tukey's "far out" fence: an expense above Q3 + 3 * IQR of its category is flagged.
+OUTLIER_FENCE = 3.0
+
+
+@dataclass
+class CategoryStats:
+    count: int
+    median: float
+    p90: float
+    outlier_above: float
+
+
+@dataclass
+class MonthChange:
+    total: float
+    # Against the previous calendar month; None for the first month. `change`
+    # is the relative change, None also when the previous month had no spend.
+    delta: float | None
+    change: float | None
+
+
+@dataclass
+class Outlier:
+    id: str
+    date: date
+    category: str
+    amount: float
+
+
+@dataclass
+class AnalyticsReport:
+    # Average daily spend over the window ending on each day, for every day
+    # from the first expense to the last; days without expenses count as zero.
+    rolling: Dict[int, Dict[date, float]]
+    categories: Dict[str, CategoryStats]
+    months: Dict[str, MonthChange]
+    # Largest first.
+    outliers: List[Outlier]
+
+
+def quantile(ordered: Sequence[int], p: float) -> float:
+    """
+    The p-quantile of sorted cents, interpolating linearly between ranks
+    (NumPy's default method). The vectorised path does the same arithmetic.
+    """
+    position = p * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    low = ordered[lower]
+    return low + (ordered[upper] - low) * (position - lower)
+
+
+def _category_quantiles(cents: Sequence[int]) -> Tuple[float, ...]:
+    ordered = sorted(cents)
+    return tuple(quantile(ordered, p) for p in QUANTILES)
+
+
+def _rolling(first: int, daily: List[int]) -> Dict[int, Dict[date, float]]:
+    running = [0, *accumulate(daily)]
+    days = [date.fromordinal(first + i) for i in range(len(daily))]
+    return {
+        window: {
+            day: (running[i + 1] - running[max(i + 1 - window, 0)]) / (window * 100)
+            for i, day in enumerate(days)
+        }
+        for window in ROLLING_WINDOWS
+    }
+
+
+def _months(first: int, daily: List[int]) -> Dict[str, MonthChange]:
+    totals: Dict[str, int] = {}
+    for i, cents in enumerate(daily):
+        key = _month_key(date.fromordinal(first + i))
+        totals[key] = totals.get(key, 0) + cents
+    months: Dict[str, MonthChange] = {}
+    previous = None
+    for key, cents in totals.items():  # every calendar month in the span, in order
+        if previous is None:
+            months[key] = MonthChange(from_cents(cents), None, None)
+        else:
+            delta = cents - previous
+            months[key] = MonthChange(
+                from_cents(cents), from_cents(delta), delta / previous if previous else None
+            )
+        previous = cents
+    return months
+
+
+def _daily_totals(ordinals, cents) -> Tuple[int, List[int]]:
+    """Cents spent on each day from the first expense to the last."""
+    if columnar.np is not None:
+        np = columnar.np
+        first = int(ordinals.min())
+        span = int(ordinals.max()) - first + 1
+        # Float sums of integer cents are exact well beyond any real total.
+        daily = np.bincount(ordinals - first, weights=cents, minlength=span)
+        return first, daily.astype(np.int64).tolist()
+    first = min(ordinals)
+    daily = [0] * (max(ordinals) - first + 1)
+    for ordinal, amount in zip(ordinals, cents):
+        daily[ordinal - first] += amount
+    return first, daily
+
+
+def _sorted_groups(cents, codes):
+    """NumPy: cents sorted by (category, amount), with each category's code, start and count."""
+    np = columnar.np
+    order = np.lexsort((cents, codes))
+    ordered, ordered_codes = cents[order], codes[order]
+    present, starts, counts = np.unique(ordered_codes, return_index=True, return_counts=True)
+    return ordered, present, starts.astype(np.int64), counts.astype(np.int64)
+
+
+def _groups(cents, codes) -> Dict[int, List[int]]:
+    """Category code -> the cents of its expenses."""
+    if columnar.np is not None:
+        ordered, present, starts, counts = _sorted_groups(cents, codes)
+        return {
+            int(code): ordered[start : start + count].tolist()
+            for code, start, count in zip(present, starts, counts)
+        }
+    groups: Dict[int, List[int]] = {}
+    for code, amount in zip(codes, cents):
+        groups.setdefault(code, []).append(amount)
+    return groups
+
+
+def _grouped_quantiles(
+    cents, codes, processes: int | None
+) -> Dict[int, Tuple[int, Tuple[float, ...]]]:
+    """Category code -> (expense count, its quantiles in cents for QUANTILES)."""
+    np = columnar.np
+    if processes and processes > 1:
+        groups = _groups(cents, codes)
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = pool.map(_category_quantiles, groups.values())
+            return {code: (len(values), q) for (code, values), q in zip(groups.items(), results)}
+    if np is None:
+        return {
+            code: (len(values), _category_quantiles(values))
+            for code, values in _groups(cents, codes).items()
+        }
+
+    # Every category at once, with the same arithmetic as quantile().
+    ordered, present, starts, counts = _sorted_groups(cents, codes)
+    columns = []
+    for p in QUANTILES:
+        position = p * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        low = ordered[starts + lower]
+        columns.append(low + (ordered[starts + upper] - low) * (position - lower))
+    return {
+        int(code): (int(count), tuple(float(column[i]) for column in columns))
+        for i, (code, count) in enumerate(zip(present, counts))
+    }
+
+
+def analyze(
+    tracker: ColumnarExpenseTracker,
+    filters: ExpenseFilter | None = None,
+    processes: int | None = None,
+    fence: float = OUTLIER_FENCE,
+) -> AnalyticsReport:
+    """
+    Computes the report for the expenses matching `filters`. An expense is an
+    outlier when its amount exceeds Q3 + fence * IQR of its category.
+    """
+    snapshot = tracker.columns(filters)
+    ordinals, cents, codes = snapshot.ordinals, snapshot.cents, snapshot.codes
+    if not len(cents):
+        return AnalyticsReport({window: {} for window in ROLLING_WINDOWS}, {}, {}, [])
+    names = snapshot.category_names
+
+    first, daily = _daily_totals(ordinals, cents)
+    grouped = _grouped_quantiles(cents, codes, processes)
+    limits = {}  # code -> cents above which an expense is an outlier
+    categories = {}
+    for code, (count, (q1, median, q3, p90)) in grouped.items():
+        limits[code] = q3 + fence * (q3 - q1)
+        categories[names[code]] = CategoryStats(count, median / 100, p90 / 100, limits[code] / 100)
+
+    np = columnar.np
+    if np is not None:
+        limit_by_code = np.full(len(names), np.inf)
+        for code, limit in limits.items():
+            limit_by_code[code] = limit
+        flagged = np.flatnonzero(cents > limit_by_code[codes]).tolist()
+    else:
+        flagged = [i for i, (amount, code) in enumerate(zip(cents, codes)) if amount > limits[code]]
+    outliers = [
+        Outlier(
+            id=snapshot.ids[i],
+            date=date.fromordinal(int(ordinals[i])),
+            category=names[int(codes[i])],
+            amount=from_cents(int(cents[i])),
+        )
+        for i in flagged
+    ]
+    outliers.sort(key=lambda o: (-o.amount, o.id))
+
+    return AnalyticsReport(
+        rolling=_rolling(first, daily),
+        categories=dict(sorted(categories.items())),
+        months=_months(first, daily),
+        outliers=outliers,
+    )
@@ -0,0 +1,271 @@
+"""
+ASGI serving mode:
+
+    uvicorn src.asgi:app --port 8000
+
+The Flask views run unchanged on a bounded pool of worker threads, sharing
+all storage, tracker and cache code with the WSGI app. Meanwhile the event
+loop owns connections, request bodies and response streaming, so a slow
+read or render ties up one thread rather than a whole worker process.
+Requests that would queue behind more than the backlog get an immediate
+503 instead of waiting without bound.
+
+    EXPENSE_TRACKER_ASGI_THREADS   worker threads (default 8)
+    EXPENSE_TRACKER_ASGI_BACKLOG   requests allowed to wait for a thread (default 64)
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+
+try:
+    from web_app import app as flask_app
+except ModuleNotFoundError:
+    from .web_app import app as flask_app
+
+
+CHUNK_SIZE = 64 * 1024  # response bytes gathered before they are handed to the loop
+STREAM_WINDOW = 8  # chunks a worker may produce ahead of a slow client
+SPOOL_SIZE = 1024 * 1024  # request bodies larger than this are buffered on disk
+
+logger = logging.getLogger(__name__)
+
+
+class _Disconnected(Exception):
+    """The client went away while a worker was still producing its response."""
+
+
+class _Channel:
+    """
+    Passes response parts from a worker thread to the event loop. put()
+    blocks once the worker is STREAM_WINDOW parts ahead, so a slow client
+    holds back a streaming export instead of it piling up in memory.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, window: int = STREAM_WINDOW):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._credits = threading.Semaphore(window)
+        self._closed = threading.Event()
+
+    def put(self, item: tuple) -> None:
+        self._credits.acquire()
+        if self._closed.is_set():
+            raise _Disconnected
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (item, True))
+
+    def finish(self, item: tuple) -> None:
+        """Sends the last item; never blocks, so it takes no credit."""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (item, False))
+
+    async def get(self) -> tuple:
+        item, credited = await self._queue.get()
+        if credited:
+            self._credits.release()
+        return item
+
+    def close(self) -> None:
+        """Called by the loop when it stops reading; wakes a blocked put()."""
+        self._closed.set()
+        self._credits.release()
+
+
+def build_environ(scope: dict, body) -> Dict[str, object]:
+    """The WSGI environ for an ASGI HTTP `scope` whose request body is the file `body`."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path) :]
+    environ: Dict[str, object] = {
+        "REQUEST_METHOD": scope["method"],
+        # WSGI carries paths as latin-1 strings of the UTF-8 bytes.
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "REMOTE_ADDR": client[0],
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+class WSGIBridge:
+    """Serves a WSGI app over ASGI, running it on `threads` worker threads."""
+
+    def __init__(self, wsgi_app: Callable, threads: int = 8, backlog: int = 64):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.backlog = backlog
+        self.in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi-worker")
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        if self.in_flight >= self.threads + self.backlog:
+            await _send_busy(send)
+            return
+        self.in_flight += 1
+        try:
+            body = await _read_body(receive)
+            loop = asyncio.get_running_loop()
+            channel = _Channel(loop)
+            future = loop.run_in_executor(
+                self._executor, self._serve, build_environ(scope, body), channel
+            )
+            try:
+                await _relay(channel, send)
+            finally:
+                # A client that went away stops the worker at its next chunk;
+                # the request counts against the backlog until then.
+                channel.close()
+                await future
+        finally:
+            self.in_flight -= 1
+
+    def _serve(self, environ: Dict[str, object], channel: _Channel) -> None:
+        """Runs in a worker thread: calls the app and streams its response to the loop."""
+        try:
+            self._respond(environ, channel)
+        except _Disconnected:
+            pass
+        except BaseException as exc:
+            channel.finish(("error", exc))
+            return
+        finally:
+            environ["wsgi.input"].close()
+        channel.finish(("end",))
+
+    def _respond(self, environ: Dict[str, object], channel: _Channel) -> None:
+        start: List[Tuple[str, List[Tuple[str, str]]] | None] = []
+        buffer: List[bytes] = []
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            if exc_info and start and start[0] is None:
+                raise exc_info[1].with_traceback(exc_info[2])
+            start[:] = [(status, headers)]
+            return buffer.append
+
+        def flush() -> None:
+            if start and start[0] is not None:
+                channel.put(("start", *start[0]))
+                start[0] = None  # headers sent
+            if buffer:
+                channel.put(("body", b"".join(buffer)))
+                buffer.clear()
+
+        result: Iterable[bytes] = self.wsgi_app(environ, start_response)
+        try:
+            size = 0
+            for data in result:
+                if data:
+                    buffer.append(data)
+                    size += len(data)
+                    # The headers go out with the first chunk, so a streamed
+                    # export starts at once; later chunks are gathered.
+                    if size >= CHUNK_SIZE or (start and start[0] is not None):
+                        flush()
+                        size = 0
+            flush()
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def _read_body(receive: Callable):
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    more = True
+    while more:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body.write(message.get("body", b""))
+        more = message.get("more_body", False)
+    body.seek(0)
+    return body
+
+
+async def _relay(channel: _Channel, send: Callable) -> None:
+    started = False
+    while True:
+        kind, *payload = await channel.get()
+        if kind == "start":
+            status, headers = payload
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": int(status.split(" ", 1)[0]),
+                    "headers": [
+                        (name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in headers
+                    ],
+                }
+            )
+            started = True
+        elif kind == "body":
+            await send({"type": "http.response.body", "body": payload[0], "more_body": True})
+        elif kind == "end":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        else:
+            logger.error("Request failed", exc_info=payload[0])
+            if not started:
+                await send({"type": "http.response.start", "status": 500, "headers": []})
+                await send({"type": "http.response.body", "body": b"Internal Server Error"})
+            else:
+                # The status is already out; end the truncated body so the client isn't left waiting.
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+
+async def _send_busy(send: Callable) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [(b"content-type", b"text/plain"), (b"retry-after", b"1")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b"Server busy, try again."})
+
+
+app = WSGIBridge(
+    flask_app,
+    threads=int(os.environ.get("EXPENSE_TRACKER_ASGI_THREADS", "8")),
+    backlog=int(os.environ.get("EXPENSE_TRACKER_ASGI_BACKLOG", "64")),
+)
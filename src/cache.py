@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Tuple, TypeVar
+
+from . import storage
+from .models import ExpenseFilter
+
+
+T = TypeVar("T")
+
+# Entries are keyed by aggregate and filter, and the filters come from query
+# strings, so the number of distinct keys has no natural bound.
+MAX_ENTRIES = 256
+
+
+class CachedTracker:
+    """
+    Memoises the aggregate methods of a tracker backed by the database at `path`.
+
+    Entries are tagged with the database's data_version, so a write made by
+    another process (e.g. a different gunicorn worker) is picked up on the next
+    call. Writes made through `storage` in this process also clear the cache
+    immediately. At most `max_entries` results are kept; the least recently
+    used is dropped first. Returned values are shared between callers and must
+    be treated as read-only. Call close() when done with a cache so `storage`
+    stops notifying it.
+    """
+
+    def __init__(self, tracker, path: str, max_entries: int = MAX_ENTRIES):
+        self.tracker = tracker
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db_path = storage.database_path(path)
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._values: OrderedDict[Hashable, object] = OrderedDict()
+        storage.add_write_listener(self._on_write)
+
+    def close(self) -> None:
+        storage.remove_write_listener(self._on_write)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._version = None
+
+    def stats(self) -> Dict[str, int | None]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._values),
+                "version": self._version,
+            }
+
+    def _on_write(self, db_path: Path) -> None:
+        if db_path == self._db_path:
+            self.invalidate()
+
+    def _get(self, name: str, filters: ExpenseFilter | None, compute: Callable[[], T]) -> T:
+        # No filter and an empty filter give the same answer; share one entry.
+        key = (name, None if filters is None or filters.is_empty() else filters)
+        version = storage.data_version(self.path)
+        with self._lock:
+            if version != self._version:
+                self._values.clear()
+                self._version = version
+            elif key in self._values:
+                self.hits += 1
+                self._values.move_to_end(key)
+                return self._values[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            # Only keep the result if no newer version was seen while computing.
+            if self._version == version:
+                self._values[key] = value
+                self._values.move_to_end(key)
+                if len(self._values) > self.max_entries:
+                    self._values.popitem(last=False)
+        return value
+
+    def total_expense(self, filters: ExpenseFilter | None = None) -> float:
+        return self._get("total_expense", filters, lambda: self.tracker.total_expense(filters))
+
+    def total_by_category(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+        return self._get(
+            "total_by_category", filters, lambda: self.tracker.total_by_category(filters)
+        )
+
+    def highest_and_lowest_category(
+        self, filters: ExpenseFilter | None = None
+    ) -> Tuple[Tuple[str, float] | None, Tuple[str, float] | None]:
+        return self._get(
+            "highest_and_lowest_category",
+            filters,
+            lambda: self.tracker.highest_and_lowest_category(filters),
+        )
+
+    def trend_by_date(self, filters: ExpenseFilter | None = None) -> Dict[date, float]:
+        return self._get("trend_by_date", filters, lambda: self.tracker.trend_by_date(filters))
+
+    def total_by_month(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+        return self._get("total_by_month", filters, lambda: self.tracker.total_by_month(filters))
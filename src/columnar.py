@@ -0,0 +1,269 @@
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .models import Expense, ExpenseFilter, to_cents
+from .tracker import _highest_and_lowest, _month_key
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the stdlib loops give the same results.
+    np = None
+
+
+@dataclass
+class ColumnSnapshot:
+    """
+    Row-aligned columns of selected expenses: NumPy arrays when NumPy is
+    installed, else sequences of ints. `codes` index into `category_names`.
+    The arrays may share memory with the tracker; treat them as read-only
+    and don't keep them across writes.
+    """
+
+    ordinals: Sequence[int]
+    cents: Sequence[int]
+    codes: Sequence[int]
+    category_names: List[str]
+    ids: List[str]
+
+
+class ColumnarExpenseTracker:
+    """
+    Drop-in alternative to ExpenseTracker for large histories.
+
+    Each field lives in its own column: dates as int ordinals and amounts as
+    integer cents in typed arrays, categories dictionary-encoded as small ints,
+    and ids/descriptions in plain lists. No Expense objects are kept; they are
+    built on demand by get_expense() and `expenses`. Aggregates are group-by
+    passes over the arrays, vectorised with NumPy when it is installed.
+    Deleting swaps the last row into the freed slot, so row order is not stable.
+    """
+
+    def __init__(self, expenses: Iterable[Expense] | None = None):
+        self._ordinals = array("i")
+        self._cents = array("q")
+        self._category_codes = array("H")
+        self._ids: List[str] = []
+        self._descriptions: List[str] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._category_names: List[str] = []
+        self._codes_by_category: Dict[str, int] = {}
+        for e in expenses or []:
+            self.add_expense(e)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _encode_category(self, category: str) -> int:
+        code = self._codes_by_category.get(category)
+        if code is None:
+            code = self._codes_by_category[category] = len(self._category_names)
+            self._category_names.append(category)
+        return code
+
+    def _build(self, row: int) -> Expense:
+        return Expense.from_stored(
+            date=date.fromordinal(self._ordinals[row]),
+            category=self._category_names[self._category_codes[row]],
+            cents=int(self._cents[row]),
+            description=self._descriptions[row],
+            id=self._ids[row],
+        )
+
+    @property
+    def expenses(self) -> List[Expense]:
+        return [self._build(row) for row in range(len(self._ids))]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, str, str, int]]) -> "ColumnarExpenseTracker":
+        """
+        Builds a tracker straight from storage rows, i.e. the
+        (id, date, category, description, amount_cents) tuples yielded by
+        storage.iter_expense_rows(). No Expense objects are created and each
+        distinct date string is parsed only once.
+        """
+        tracker = cls()
+        ordinals: Dict[str, int] = {}
+        for expense_id, date_text, category, description, cents in rows:
+            ordinal = ordinals.get(date_text)
+            if ordinal is None:
+                ordinal = ordinals[date_text] = date.fromisoformat(date_text).toordinal()
+            tracker._append(expense_id, ordinal, cents, category, description or "")
+        return tracker
+
+    def _append(self, expense_id: str, ordinal: int, cents: int, category: str, description: str) -> None:
+        if expense_id in self._row_by_id:
+            self.delete_expense(expense_id)
+        self._row_by_id[expense_id] = len(self._ids)
+        self._ordinals.append(ordinal)
+        self._cents.append(cents)
+        self._category_codes.append(self._encode_category(category))
+        self._ids.append(expense_id)
+        self._descriptions.append(description)
+
+    def add_expense(self, expense: Expense) -> None:
+        self._append(
+            expense.id, expense.date.toordinal(), expense.cents, expense.category, expense.description
+        )
+
+    def get_expense(self, expense_id: str) -> Expense | None:
+        row = self._row_by_id.get(expense_id)
+        return None if row is None else self._build(row)
+
+    def update_expense(
+        self, expense_id: str, *, date: date, category: str, amount: float, description: str
+    ) -> bool:
+        row = self._row_by_id.get(expense_id)
+        if row is None:
+            return False
+        self._ordinals[row] = date.toordinal()
+        self._cents[row] = to_cents(amount)
+        self._category_codes[row] = self._encode_category(category)
+        self._descriptions[row] = description
+        return True
+
+    def delete_expense(self, expense_id: str) -> bool:
+        row = self._row_by_id.pop(expense_id, None)
+        if row is None:
+            return False
+        last = len(self._ids) - 1
+        if row != last:
+            self._ordinals[row] = self._ordinals[last]
+            self._cents[row] = self._cents[last]
+            self._category_codes[row] = self._category_codes[last]
+            self._ids[row] = self._ids[last]
+            self._descriptions[row] = self._descriptions[last]
+            self._row_by_id[self._ids[row]] = row
+        self._ordinals.pop()
+        self._cents.pop()
+        self._category_codes.pop()
+        self._ids.pop()
+        self._descriptions.pop()
+        return True
+
+    def _wanted_codes(self, filters: ExpenseFilter) -> set[int]:
+        return {
+            self._codes_by_category[c] for c in filters.categories if c in self._codes_by_category
+        }
+
+    def _mask(self, filters: ExpenseFilter):
+        """NumPy boolean mask of the rows matching non-empty `filters`."""
+        ordinals = np.frombuffer(self._ordinals, dtype=np.int32)
+        mask = np.ones(len(self._ids), dtype=bool)
+        if filters.start is not None:
+            mask &= ordinals >= filters.start.toordinal()
+        if filters.end is not None:
+            mask &= ordinals <= filters.end.toordinal()
+        if filters.categories is not None:
+            codes = np.frombuffer(self._category_codes, dtype=np.uint16)
+            mask &= np.isin(codes, list(self._wanted_codes(filters)))
+        return mask
+
+    def _selected_rows(self, filters: ExpenseFilter | None) -> Sequence[int] | None:
+        """Row numbers matching `filters` in row order, or None when every row does."""
+        if filters is None or filters.is_empty():
+            return None
+        if np is not None:
+            return np.flatnonzero(self._mask(filters))
+        start = filters.start.toordinal() if filters.start is not None else None
+        end = filters.end.toordinal() if filters.end is not None else None
+        wanted_codes = None if filters.categories is None else self._wanted_codes(filters)
+        return [
+            row
+            for row, (ordinal, code) in enumerate(zip(self._ordinals, self._category_codes))
+            if (start is None or ordinal >= start)
+            and (end is None or ordinal <= end)
+            and (wanted_codes is None or code in wanted_codes)
+        ]
+
+    def _take(self, rows: Sequence[int] | None) -> Tuple[Sequence[int], Sequence[int], Sequence[int]]:
+        """The (ordinals, cents, category codes) columns at `rows`; whole when rows is None."""
+        if np is not None:
+            ordinals = np.frombuffer(self._ordinals, dtype=np.int32)
+            cents = np.frombuffer(self._cents, dtype=np.int64)
+            codes = np.frombuffer(self._category_codes, dtype=np.uint16)
+            if rows is None:
+                return ordinals, cents, codes
+            return ordinals[rows], cents[rows], codes[rows]
+
+        if rows is None:
+            return self._ordinals, self._cents, self._category_codes
+        return (
+            [self._ordinals[row] for row in rows],
+            [self._cents[row] for row in rows],
+            [self._category_codes[row] for row in rows],
+        )
+
+    def _columns(
+        self, filters: ExpenseFilter | None
+    ) -> Tuple[Sequence[int], Sequence[int], Sequence[int]]:
+        """Returns the (ordinals, cents, category codes) columns restricted to `filters`."""
+        return self._take(self._selected_rows(filters))
+
+    def columns(self, filters: ExpenseFilter | None = None) -> "ColumnSnapshot":
+        """The row-aligned columns of the expenses matching `filters`, for analysis."""
+        rows = self._selected_rows(filters)
+        ordinals, cents, codes = self._take(rows)
+        ids = list(self._ids) if rows is None else [self._ids[row] for row in rows]
+        return ColumnSnapshot(ordinals, cents, codes, list(self._category_names), ids)
+
+    def _cents_by_category(self, filters: ExpenseFilter | None) -> Dict[int, int]:
+        _, cents, codes = self._columns(filters)
+        if np is not None:
+            if not len(codes):
+                return {}
+            minlength = len(self._category_names)
+            sums = np.bincount(codes, weights=cents, minlength=minlength)
+            counts = np.bincount(codes, minlength=minlength)
+            return {int(code): int(sums[code]) for code in np.flatnonzero(counts)}
+
+        totals: Dict[int, int] = {}
+        for code, amount in zip(codes, cents):
+            totals[code] = totals.get(code, 0) + amount
+        return totals
+
+    def _cents_by_ordinal(self, filters: ExpenseFilter | None) -> List[Tuple[int, int]]:
+        ordinals, cents, _ = self._columns(filters)
+        if np is not None:
+            if not len(ordinals):
+                return []
+            days, inverse = np.unique(ordinals, return_inverse=True)
+            sums = np.bincount(inverse, weights=cents)
+            return list(zip(days.tolist(), sums.astype(np.int64).tolist()))
+
+        totals: Dict[int, int] = {}
+        for ordinal, amount in zip(ordinals, cents):
+            totals[ordinal] = totals.get(ordinal, 0) + amount
+        return sorted(totals.items())
+
+    def total_expense(self, filters: ExpenseFilter | None = None) -> float:
+        _, cents, _ = self._columns(filters)
+        if np is not None:
+            return int(cents.sum()) / 100
+        return sum(cents) / 100
+
+    def total_by_category(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+        return {
+            self._category_names[code]: cents / 100
+            for code, cents in self._cents_by_category(filters).items()
+        }
+
+    def highest_and_lowest_category(
+        self, filters: ExpenseFilter | None = None
+    ) -> Tuple[Tuple[str, float] | None, Tuple[str, float] | None]:
+        return _highest_and_lowest(self.total_by_category(filters))
+
+    def trend_by_date(self, filters: ExpenseFilter | None = None) -> Dict[date, float]:
+        return {
+            date.fromordinal(ordinal): cents / 100
+            for ordinal, cents in self._cents_by_ordinal(filters)
+        }
+
+    def total_by_month(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+        # Roll the (already sorted) daily totals up into months: O(days), not O(rows).
+        totals: Dict[str, int] = {}
+        for ordinal, cents in self._cents_by_ordinal(filters):
+            key = _month_key(date.fromordinal(ordinal))
+            totals[key] = totals.get(key, 0) + cents
+        return {month: cents / 100 for month, cents in totals.items()}
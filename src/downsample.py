@@ -0,0 +1,115 @@
+"""
+Bounding the size of trend series, however long the history:
+- lttb() picks the points of a series that keep its visual shape
+  (Largest-Triangle-Three-Buckets), for charts;
+- bucket_by_period() sums daily totals into weeks, months, quarters or
+  years, for tables, so every row is still a true total.
+"""
+from datetime import date, timedelta
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+from .models import from_cents, to_cents
+from .tracker import _month_key
+
+
+MIN_POINTS = 3  # LTTB always keeps the first and last point
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], points: int) -> List[int]:
+    """
+    Indices of at most `points` points of the series (xs ascending) that
+    best preserve its shape: the first and last point, and from each of the
+    buckets in between the point forming the largest triangle with the one
+    picked before it and the average of the next bucket.
+    """
+    n = len(xs)
+    if points >= n or points < MIN_POINTS:
+        return list(range(n))
+    every = (n - 2) / (points - 2)
+    selected = [0]
+    a = 0
+    for i in range(points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        next_count = next_end - end
+        avg_x = sum(xs[end:next_end]) / next_count
+        avg_y = sum(ys[end:next_end]) / next_count
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            # Twice the triangle's area; only the comparison matters.
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def downsample_daily(trend: Dict[date, float], points: int) -> Dict[date, float]:
+    """At most `points` days of a date-sorted daily series, chosen by lttb()."""
+    days = list(trend)
+    values = list(trend.values())
+    keep = lttb([d.toordinal() for d in days], values, points)
+    return {days[i]: values[i] for i in keep}
+
+
+def downsample_monthly(totals: Dict[str, float], points: int) -> Dict[str, float]:
+    """At most `points` months of a sorted YYYY-MM series, chosen by lttb()."""
+    months = list(totals)
+    values = list(totals.values())
+    keep = lttb([int(m[:4]) * 12 + int(m[5:7]) for m in months], values, points)
+    return {months[i]: values[i] for i in keep}
+
+
+def _week_key(d: date) -> str:
+    return (d - timedelta(days=d.weekday())).isoformat()  # the week's Monday
+
+
+def _quarter_key(d: date) -> str:
+    return f"{d.year:04d}-Q{(d.month - 1) // 3 + 1}"
+
+
+def _year_key(d: date) -> str:
+    return f"{d.year:04d}"
+
+
+PERIODS: Tuple[Tuple[str, Callable[[date], str]], ...] = (
+    ("week", _week_key),
+    ("month", _month_key),
+    ("quarter", _quarter_key),
+    ("year", _year_key),
+)
+
+
+def _totals_by(trend: Dict[date, float], key: Callable[[date], Hashable]) -> Dict[Hashable, int]:
+    totals: Dict[Hashable, int] = {}
+    for d, amount in trend.items():
+        label = key(d)
+        totals[label] = totals.get(label, 0) + to_cents(amount)
+    return totals
+
+
+def bucket_by_period(trend: Dict[date, float], rows: int) -> Tuple[str, List[Tuple[str, float]]]:
+    """
+    The daily series as at most `rows` rows: days if they fit, else the
+    finest of weeks (labelled by their Monday), months, quarters and years
+    that fits, else spans of several years. Returns the period name ("day",
+    "week", "month", "quarter", "year" or "years") and the (label, total)
+    rows in date order.
+    """
+    if len(trend) <= rows:
+        return "day", [(d.isoformat(), amount) for d, amount in trend.items()]
+    for period, key in PERIODS:
+        totals = _totals_by(trend, key)
+        if len(totals) <= rows:
+            return period, [(label, from_cents(cents)) for label, cents in sorted(totals.items())]
+    first = min(trend).year
+    width = -(-(max(trend).year - first + 1) // rows)  # years per row, rounded up
+    totals = _totals_by(trend, lambda d: first + (d.year - first) // width * width)
+    return "years", [
+        (f"{start:04d}–{start + width - 1:04d}", from_cents(cents))
+        for start, cents in sorted(totals.items())
+    ]
@@ -0,0 +1,137 @@
+"""
+Streaming bulk import of expenses from CSV.
+
+    python -m src.importer bank_export.csv [--data-file data/expenses.csv]
+
+Rows are parsed one at a time, validated with the same rules as the web form,
+and inserted in fixed-size batches, each committed in its own transaction.
+Rows whose id already exists are skipped, so re-running an interrupted import
+is safe. Memory use depends on the batch size, not on the file size.
+"""
+import argparse
+import csv
+import io
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, TextIO, Tuple
+from uuid import uuid4
+
+from . import storage
+from .models import Expense
+from .validation import process_expense_form
+
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+
+
+@dataclass
+class ImportReport:
+    accepted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    # (line number, message) for the first MAX_REPORTED_ERRORS rejected rows.
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.accepted + self.duplicates + self.rejected
+
+
+def iter_rows(stream: TextIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yields (line number, row) pairs, with missing fields as empty strings."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, {key: value or "" for key, value in row.items() if key}
+
+
+def validate_row(row: Dict[str, str]) -> Tuple[Expense | None, str | None]:
+    # The web form defaults an empty date to today; an imported row has no
+    # such default, so a missing date is an error.
+    if not row.get("date", "").strip():
+        return None, "Date is required."
+    _, parsed, error = process_expense_form(row)
+    if error:
+        return None, error
+    return (
+        Expense(
+            date=parsed["date"],
+            category=parsed["category"],
+            amount=parsed["amount"],
+            description=parsed["description"],
+            id=row.get("id", "").strip() or uuid4().hex,
+        ),
+        None,
+    )
+
+
+def import_csv(path: str, stream: TextIO, batch_size: int = BATCH_SIZE) -> ImportReport:
+    """Imports the CSV read from `stream` into the database for `path`."""
+    report = ImportReport()
+    batch: List[Expense] = []
+
+    def flush() -> None:
+        inserted = storage.insert_new_expenses(path, batch)
+        report.accepted += inserted
+        report.duplicates += len(batch) - inserted
+        batch.clear()
+
+    line_number = 1  # the header
+    try:
+        for line_number, row in iter_rows(stream):
+            expense, error = validate_row(row)
+            if error:
+                report.rejected += 1
+                if len(report.errors) < MAX_REPORTED_ERRORS:
+                    report.errors.append((line_number, error))
+                continue
+            batch.append(expense)
+            if len(batch) >= batch_size:
+                flush()
+    except UnicodeDecodeError:
+        # Text is decoded a block at a time, so the bad bytes may be a few
+        # lines past the last row read; nothing after that row is imported.
+        report.rejected += 1
+        report.errors.append(
+            (line_number + 1, "File is not UTF-8 text; this line and the rest were not imported.")
+        )
+    if batch:
+        flush()
+    return report
+
+
+def import_file(path: str, csv_path: Path, batch_size: int = BATCH_SIZE) -> ImportReport:
+    with csv_path.open(newline="", encoding="utf-8-sig") as f:
+        return import_csv(path, f, batch_size)
+
+
+def import_upload(path: str, binary_stream, batch_size: int = BATCH_SIZE) -> ImportReport:
+    """Imports from a binary file object such as a Flask upload."""
+    stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+    try:
+        return import_csv(path, stream, batch_size)
+    finally:
+        stream.detach()
+
+
+def main() -> None:
+    from .web_app import DATA_FILE
+
+    parser = argparse.ArgumentParser(description="Bulk import expenses from a CSV file.")
+    parser.add_argument("csv_file", type=Path)
+    parser.add_argument("--data-file", default=str(DATA_FILE), help="expenses CSV/DB path")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    report = import_file(args.data_file, args.csv_file, args.batch_size)
+    print(f"Accepted:   {report.accepted}")
+    print(f"Duplicates: {report.duplicates}")
+    print(f"Rejected:   {report.rejected}")
+    for line_number, error in report.errors:
+        print(f"  line {line_number}: {error}")
+    if report.rejected > len(report.errors):
+        print(f"  ... and {report.rejected - len(report.errors)} more")
+
+
+if __name__ == "__main__":
+    main()
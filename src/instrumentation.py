@@ -0,0 +1,314 @@
+"""
+Opt-in per-request timing for the web app.
+
+Code marks the phases it spends time in (`with phase("query"): ...` or the
+`@timed("save")` decorator); while a request is being instrumented the time
+is charged to that phase, otherwise the markers do nothing. Phases nest and
+are exclusive: time spent in an inner phase is not also charged to the outer
+one, so the phases of a request add up to at most its total duration.
+
+Enable it with EXPENSE_TRACKER_INSTRUMENTATION=1 (or the INSTRUMENTATION
+config key). Each response then carries a Server-Timing header and
+/metrics serves Prometheus text. Setting EXPENSE_TRACKER_PROFILE_RATE to a
+fraction profiles that share of requests with cProfile and keeps the dumps
+of the slowest ones in EXPENSE_TRACKER_PROFILE_DIR.
+"""
+import cProfile
+import contextvars
+import functools
+import heapq
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple, TypeVar
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRIC_PREFIX = "expense_tracker"
+
+F = TypeVar("F", bound=Callable)
+
+
+class RequestTimings:
+    """Exclusive seconds per phase for one request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._stack: List[List] = []  # [phase name, time it last resumed]
+
+    def enter(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.phases[parent[0]] = self.phases.get(parent[0], 0.0) + now - parent[1]
+        self._stack.append([name, now])
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        name, resumed = self._stack.pop()
+        self.phases[name] = self.phases.get(name, 0.0) + now - resumed
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+class _Phase:
+    __slots__ = ("name", "timings")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: RequestTimings | None = None
+
+    def __enter__(self) -> None:
+        self.timings = _current.get()
+        if self.timings is not None:
+            self.timings.enter(self.name)
+
+    def __exit__(self, *exc_info) -> bool:
+        if self.timings is not None:
+            self.timings.exit()
+        return False
+
+
+def phase(name: str) -> _Phase:
+    return _Phase(name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of phase(): charges every call of the function to `name`."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Phase(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def end_request() -> None:
+    _current.set(None)
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: object) -> str:
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + body + "}" if body else ""
+
+
+def format_metric(
+    name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, object], float]]
+) -> List[str]:
+    """Renders one metric family in Prometheus text format."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(**labels)} {value}" for labels, value in samples)
+    return lines
+
+
+class Metrics:
+    """Request counts, a duration histogram and phase totals, per endpoint."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        # endpoint -> [per-bucket counts, sum, count]
+        self._durations: Dict[str, List] = {}
+        self._phase_seconds: Dict[Tuple[str, str], float] = {}
+
+    def observe(
+        self, endpoint: str, method: str, status: int, duration: float, phases: Dict[str, float]
+    ) -> None:
+        with self._lock:
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._durations.setdefault(endpoint, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += duration
+            histogram[2] += 1
+            for name, seconds in phases.items():
+                key = (endpoint, name)
+                self._phase_seconds[key] = self._phase_seconds.get(key, 0.0) + seconds
+
+    def render(self) -> List[str]:
+        with self._lock:
+            requests = sorted(self._requests.items())
+            durations = sorted(
+                (endpoint, (list(counts), total, count))
+                for endpoint, (counts, total, count) in self._durations.items()
+            )
+            phase_seconds = sorted(self._phase_seconds.items())
+
+        lines = format_metric(
+            f"{METRIC_PREFIX}_requests_total",
+            "counter",
+            "Requests handled, by endpoint, method and status.",
+            (
+                ({"endpoint": endpoint, "method": method, "status": status}, count)
+                for (endpoint, method, status), count in requests
+            ),
+        )
+
+        name = f"{METRIC_PREFIX}_request_duration_seconds"
+        lines += [f"# HELP {name} Request duration in seconds.", f"# TYPE {name} histogram"]
+        for endpoint, (counts, total, count) in durations:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{name}_bucket{_labels(endpoint=endpoint, le=bound)} {bucket_count}")
+            lines.append(f"{name}_bucket{_labels(endpoint=endpoint, le='+Inf')} {count}")
+            lines.append(f"{name}_sum{_labels(endpoint=endpoint)} {total}")
+            lines.append(f"{name}_count{_labels(endpoint=endpoint)} {count}")
+
+        lines += format_metric(
+            f"{METRIC_PREFIX}_phase_seconds_total",
+            "counter",
+            "Exclusive seconds spent in each request phase.",
+            (
+                ({"endpoint": endpoint, "phase": phase_name}, seconds)
+                for (endpoint, phase_name), seconds in phase_seconds
+            ),
+        )
+        return lines
+
+
+class SlowRequestProfiler:
+    """
+    Runs cProfile on a random `sample_rate` share of requests, one at a time,
+    and keeps the .prof dumps of the `keep` slowest profiled requests.
+    """
+
+    def __init__(self, directory: Path, sample_rate: float, keep: int = 10):
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._kept: List[Tuple[float, str]] = []  # min-heap of (duration, file name)
+
+    def start(self) -> cProfile.Profile | None:
+        if random.random() >= self.sample_rate or not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is already running
+            self._active.release()
+            return None
+        return profile
+
+    def abandon(self, profile: cProfile.Profile) -> None:
+        profile.disable()
+        self._active.release()
+
+    def finish(self, profile: cProfile.Profile, endpoint: str, duration: float) -> Path | None:
+        """Stops `profile` and returns the dump's path if it was slow enough to keep."""
+        profile.disable()
+        self._active.release()
+        with self._lock:
+            if len(self._kept) >= self.keep and duration <= self._kept[0][0]:
+                return None
+            self.directory.mkdir(parents=True, exist_ok=True)
+            file_name = f"{duration * 1000:010.1f}ms-{endpoint}-{time.time_ns()}.prof"
+            profile.dump_stats(self.directory / file_name)
+            heapq.heappush(self._kept, (duration, file_name))
+            if len(self._kept) > self.keep:
+                _, evicted = heapq.heappop(self._kept)
+                (self.directory / evicted).unlink(missing_ok=True)
+        return self.directory / file_name
+
+
+def init_app(app, metric_sources: Iterable[Callable[[], List[str]]] = ()) -> Metrics:
+    """
+    Registers the timing hooks and /metrics on a Flask app. Both stay inert
+    until app.config["INSTRUMENTATION"] is true. `metric_sources` return
+    extra Prometheus lines to append to /metrics.
+    """
+    from flask import Response, abort, g, request
+
+    env = os.environ
+    app.config.setdefault(
+        "INSTRUMENTATION", env.get("EXPENSE_TRACKER_INSTRUMENTATION", "") not in ("", "0")
+    )
+    app.config.setdefault("PROFILE_SAMPLE_RATE", float(env.get("EXPENSE_TRACKER_PROFILE_RATE", 0)))
+    app.config.setdefault("PROFILE_DIR", env.get("EXPENSE_TRACKER_PROFILE_DIR", "profiles"))
+    app.config.setdefault("PROFILE_KEEP", 10)
+
+    metrics = Metrics()
+    sources = list(metric_sources)
+    profilers: Dict[Tuple[str, float, int], SlowRequestProfiler] = {}
+
+    def profiler() -> SlowRequestProfiler | None:
+        rate = app.config["PROFILE_SAMPLE_RATE"]
+        if rate <= 0:
+            return None
+        key = (str(app.config["PROFILE_DIR"]), rate, app.config["PROFILE_KEEP"])
+        if key not in profilers:
+            profilers[key] = SlowRequestProfiler(Path(key[0]), rate, key[2])
+        return profilers[key]
+
+    @app.before_request
+    def _start_timing():
+        if not app.config["INSTRUMENTATION"]:
+            return
+        g.instrumentation_timings = start_request()
+        slow_profiler = profiler()
+        if slow_profiler is not None:
+            g.instrumentation_profile = (slow_profiler, slow_profiler.start())
+
+    @app.after_request
+    def _finish_timing(response):
+        timings = g.pop("instrumentation_timings", None)
+        if timings is None:
+            return response
+        duration = time.perf_counter() - timings.started
+        endpoint = request.endpoint or "unmatched"
+        slow_profiler, profile = g.pop("instrumentation_profile", (None, None))
+        if profile is not None:
+            slow_profiler.finish(profile, endpoint, duration)
+        response.headers["Server-Timing"] = timings.server_timing(duration)
+        metrics.observe(endpoint, request.method, response.status_code, duration, timings.phases)
+        return response
+
+    @app.teardown_request
+    def _end_timing(exc):
+        slow_profiler, profile = g.pop("instrumentation_profile", (None, None))
+        if profile is not None:
+            # after_request did not run (an unhandled error); drop the profile.
+            slow_profiler.abandon(profile)
+        end_request()
+
+    def metrics_view():
+        if not app.config["INSTRUMENTATION"]:
+            abort(404)
+        lines = metrics.render()
+        for source in sources:
+            lines += source()
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    app.extensions["instrumentation"] = metrics
+    return metrics
@@ -1,12 +1,113 @@
-from dataclasses import dataclass, field
-from datetime import date
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
 from uuid import uuid4
 
 
-@dataclass
+# SQLite INTEGER is a signed 64-bit value.
+MAX_CENTS = 2**63 - 1
+
+
+def to_cents(amount: float | str | Decimal) -> int:
+    """
+    Converts an amount to whole cents, rounding half up on the decimal value
+    (so 0.285 becomes 29, not the 28 that float arithmetic would give).
+    Raises ValueError for text that is not a number, for infinities and NaN,
+    and for amounts too large to store.
+    """
+    try:
+        value = Decimal(str(amount))
+        if not value.is_finite():
+            raise ValueError
+        cents = int(value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+    except (ArithmeticError, ValueError):
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+    if abs(cents) > MAX_CENTS:
+        raise ValueError(f"Amount out of range: {amount!r}")
+    return cents
+
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+
+def format_cents(cents: int) -> str:
+    """Formats cents as a plain decimal string, e.g. 1250 -> "12.50"."""
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
+def parse_iso_date(text: str) -> date:
+    """
+    Parses a YYYY-MM-DD date. Well-formed input takes the date.fromisoformat()
+    fast path; anything else goes through strptime, which also accepts
+    unpadded forms such as 2025-1-5 and produces the usual ValueError.
+    """
+    if len(text) == 10 and text[4] == "-" and text[7] == "-":
+        try:
+            return date.fromisoformat(text)
+        except ValueError:
+            pass
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+@dataclass(init=False)
 class Expense:
     date: date
     category: str
-    amount: float
-    description: str = ""
-    id: str = field(default_factory=lambda: uuid4().hex)
+    # The amount in whole cents; this is what storage and aggregation use.
+    # `amount` is derived from it, so the two can never disagree.
+    cents: int
+    description: str
+    id: str
+
+    def __init__(
+        self,
+        date: date,
+        category: str,
+        amount: float | str | Decimal,
+        description: str = "",
+        id: str | None = None,
+    ):
+        self.date = date
+        self.category = category
+        self.cents = to_cents(amount)
+        self.description = description
+        self.id = id or uuid4().hex
+
+    @classmethod
+    def from_stored(
+        cls, date: date, category: str, cents: int, description: str, id: str
+    ) -> "Expense":
+        """Builds an expense from trusted stored values, skipping the amount conversion."""
+        expense = cls.__new__(cls)
+        expense.date = date
+        expense.category = category
+        expense.cents = cents
+        expense.description = description
+        expense.id = id
+        return expense
+
+    @property
+    def amount(self) -> float:
+        return from_cents(self.cents)
+
+    @amount.setter
+    def amount(self, value: float | str | Decimal) -> None:
+        self.cents = to_cents(value)
+
+
+@dataclass(frozen=True)
+class ExpenseFilter:
+    """
+    Optional restriction to an inclusive date range and/or a set of categories.
+    A field left as None does not filter.
+    """
+
+    start: date | None = None
+    end: date | None = None
+    categories: frozenset[str] | None = None
+
+    def is_empty(self) -> bool:
+        return self.start is None and self.end is None and self.categories is None
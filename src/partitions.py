@@ -0,0 +1,115 @@
+"""
+Year partitions: closed years moved out of the live database.
+
+`archive` moves every expense of a past year into its own database next to
+the live one (data/expenses.2023.db for 2023). Each archive has the full
+schema, so its rollup tables hold the year's precomputed aggregates and its
+search index covers its descriptions. The storage query layer reads archives
+read-only and only when they overlap the requested date range. The archives
+table in the live database lists them.
+
+    python -m src.partitions archive 2023 [--data-file data/expenses.csv]
+    python -m src.partitions list [--data-file data/expenses.csv]
+
+Archiving a year again moves expenses recorded for it since. Archived
+expenses cannot be edited or deleted.
+"""
+import argparse
+import sqlite3
+from datetime import date
+
+from .models import ExpenseFilter, format_cents
+
+
+ARCHIVES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    year INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    total_cents INTEGER NOT NULL
+)
+"""
+
+
+def overlaps(year: int, filters: ExpenseFilter | None) -> bool:
+    """True when the date range of `filters` includes any day of `year`."""
+    if filters is None:
+        return True
+    if filters.start is not None and filters.start.year > year:
+        return False
+    if filters.end is not None and filters.end.year < year:
+        return False
+    return True
+
+
+def check_closed(year: int, today: date | None = None) -> None:
+    current = (today or date.today()).year
+    if year >= current:
+        raise ValueError(f"Only years before {current} can be archived, not {year}")
+
+
+def move_year(conn: sqlite3.Connection, year: int, file_name: str) -> int:
+    """
+    Moves the expenses of `year` from the main database into the one attached
+    as `archive`, and records the archive. Runs inside the caller's
+    transaction; returns the number of expenses moved.
+    """
+    start, end = f"{year:04d}-01-01", f"{year:04d}-12-31"
+    # OR IGNORE and deleting only what the archive holds let an interrupted
+    # run be repeated safely.
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO archive.expenses (id, date, category, description, amount_cents)
+        SELECT id, date, category, description, amount_cents FROM main.expenses
+        WHERE date BETWEEN ? AND ?
+        """,
+        (start, end),
+    )
+    moved = conn.execute(
+        """
+        DELETE FROM main.expenses
+        WHERE date BETWEEN ? AND ? AND id IN (SELECT id FROM archive.expenses)
+        """,
+        (start, end),
+    ).rowcount
+    conn.execute(
+        """
+        INSERT INTO main.archives (year, file, row_count, total_cents)
+        SELECT ?, ?, COUNT(*), COALESCE(SUM(amount_cents), 0) FROM archive.expenses
+        WHERE true  -- lets SQLite parse the upsert after a SELECT
+        ON CONFLICT (year) DO UPDATE SET
+            file = excluded.file,
+            row_count = excluded.row_count,
+            total_cents = excluded.total_cents
+        """,
+        (year, file_name),
+    )
+    return moved
+
+
+def main() -> None:
+    from . import storage
+    from .web_app import DATA_FILE
+
+    parser = argparse.ArgumentParser(description="Archive closed years of expenses.")
+    parser.add_argument("command", choices=["archive", "list"])
+    parser.add_argument("year", type=int, nargs="?", help="the year to archive")
+    parser.add_argument("--data-file", default=str(DATA_FILE), help="expenses CSV/DB path")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        if args.year is None:
+            parser.error("archive needs a year")
+        try:
+            moved = storage.archive_year(args.data_file, args.year)
+        except ValueError as exc:
+            parser.error(str(exc))
+        print(f"Moved {moved} expenses to {storage.archive_path(args.data_file, args.year)}.")
+        return
+
+    for year, row_count, total_cents in storage.list_archives(args.data_file):
+        print(f"{year}: {row_count} expenses, {format_cents(total_cents)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Daily and monthly per-category rollups of the expenses table.
+
+The rollup tables are kept current by triggers on expenses, so trend and
+total queries read at most one row per (day or month, category) instead of
+scanning raw expenses. Rebuild or verify them from the command line:
+
+    python -m src.rollups verify [--data-file data/expenses.csv]
+    python -m src.rollups rebuild [--data-file data/expenses.csv]
+"""
+import argparse
+import sqlite3
+from typing import List
+
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_totals (
+    date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total_cents INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (date, category)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS monthly_totals (
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total_cents INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (month, category)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS expenses_rollup_insert AFTER INSERT ON expenses
+BEGIN
+    INSERT INTO daily_totals (date, category, total_cents, count)
+    VALUES (NEW.date, NEW.category, NEW.amount_cents, 1)
+    ON CONFLICT (date, category) DO UPDATE
+    SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+
+    INSERT INTO monthly_totals (month, category, total_cents, count)
+    VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount_cents, 1)
+    ON CONFLICT (month, category) DO UPDATE
+    SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS expenses_rollup_delete AFTER DELETE ON expenses
+BEGIN
+    UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE date = OLD.date AND category = OLD.category;
+    DELETE FROM daily_totals
+    WHERE date = OLD.date AND category = OLD.category AND count = 0;
+
+    UPDATE monthly_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+    DELETE FROM monthly_totals
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS expenses_rollup_update
+AFTER UPDATE OF date, category, amount_cents ON expenses
+BEGIN
+    UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE date = OLD.date AND category = OLD.category;
+    DELETE FROM daily_totals
+    WHERE date = OLD.date AND category = OLD.category AND count = 0;
+
+    UPDATE monthly_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+    DELETE FROM monthly_totals
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count = 0;
+
+    INSERT INTO daily_totals (date, category, total_cents, count)
+    VALUES (NEW.date, NEW.category, NEW.amount_cents, 1)
+    ON CONFLICT (date, category) DO UPDATE
+    SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+
+    INSERT INTO monthly_totals (month, category, total_cents, count)
+    VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount_cents, 1)
+    ON CONFLICT (month, category) DO UPDATE
+    SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+END;
+"""
+
+
+def init_rollups(conn: sqlite3.Connection) -> None:
+    """Creates the rollup tables and triggers, backfilling them on first creation."""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_totals'"
+    ).fetchone()
+    conn.executescript(ROLLUP_SCHEMA)
+    if not existed:
+        rebuild(conn)
+
+
+def rebuild(conn: sqlite3.Connection) -> None:
+    """Recomputes both rollup tables from the raw expenses in one transaction."""
+    with conn:
+        conn.execute("DELETE FROM daily_totals")
+        conn.execute("DELETE FROM monthly_totals")
+        conn.execute(
+            """
+            INSERT INTO daily_totals (date, category, total_cents, count)
+            SELECT date, category, SUM(amount_cents), COUNT(*)
+            FROM expenses
+            GROUP BY date, category
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO monthly_totals (month, category, total_cents, count)
+            SELECT substr(date, 1, 7), category, SUM(total_cents), SUM(count)
+            FROM daily_totals
+            GROUP BY substr(date, 1, 7), category
+            """
+        )
+
+
+def verify(conn: sqlite3.Connection) -> List[str]:
+    """
+    Compares the rollups with a full recompute from expenses. Totals are
+    integer cents, so the comparison is exact.
+    Returns a description of every mismatching group; empty means consistent.
+    """
+    problems: List[str] = []
+    checks = [
+        (
+            "daily",
+            """
+            SELECT date, category, SUM(amount_cents), COUNT(*)
+            FROM expenses GROUP BY date, category
+            """,
+            "SELECT date, category, total_cents, count FROM daily_totals",
+        ),
+        (
+            "monthly",
+            """
+            SELECT substr(date, 1, 7), category, SUM(amount_cents), COUNT(*)
+            FROM expenses GROUP BY substr(date, 1, 7), category
+            """,
+            "SELECT month, category, total_cents, count FROM monthly_totals",
+        ),
+    ]
+    for name, expected_sql, actual_sql in checks:
+        expected = {(k, c): (t, n) for k, c, t, n in conn.execute(expected_sql)}
+        actual = {(k, c): (t, n) for k, c, t, n in conn.execute(actual_sql)}
+        for key in sorted(expected.keys() | actual.keys()):
+            want = expected.get(key)
+            got = actual.get(key)
+            if want != got:
+                problems.append(f"{name} {key[0]} {key[1]}: expected {want}, found {got}")
+    return problems
+
+
+def main() -> None:
+    from . import storage
+    from .web_app import DATA_FILE
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild the expense rollup tables.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--data-file", default=str(DATA_FILE), help="expenses CSV/DB path")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        storage.rebuild_rollups(args.data_file)
+        print("Rollups rebuilt.")
+        return
+
+    problems = storage.verify_rollups(args.data_file)
+    for problem in problems:
+        print(problem)
+    print("Rollups are consistent." if not problems else f"{len(problems)} mismatching groups.")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Full-text search over expense descriptions and categories.
+
+expenses_fts is an FTS5 index over the expenses table (external content, so
+the text is not stored twice) and is kept current by triggers. Rebuild or
+check it from the command line:
+
+    python -m src.search rebuild [--data-file data/expenses.csv]
+    python -m src.search check [--data-file data/expenses.csv]
+
+The index refers to expenses by rowid; run `rebuild` after a VACUUM, which
+may renumber them.
+"""
+import argparse
+import re
+import sqlite3
+
+
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+    description,
+    category,
+    content = 'expenses',
+    content_rowid = 'rowid',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses
+BEGIN
+    INSERT INTO expenses_fts (rowid, description, category)
+    VALUES (NEW.rowid, NEW.description, NEW.category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses
+BEGIN
+    INSERT INTO expenses_fts (expenses_fts, rowid, description, category)
+    VALUES ('delete', OLD.rowid, OLD.description, OLD.category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS expenses_fts_update
+AFTER UPDATE OF description, category ON expenses
+BEGIN
+    INSERT INTO expenses_fts (expenses_fts, rowid, description, category)
+    VALUES ('delete', OLD.rowid, OLD.description, OLD.category);
+    INSERT INTO expenses_fts (rowid, description, category)
+    VALUES (NEW.rowid, NEW.description, NEW.category);
+END;
+"""
+
+DROP_SEARCH = """
+DROP TRIGGER IF EXISTS expenses_fts_insert;
+DROP TRIGGER IF EXISTS expenses_fts_delete;
+DROP TRIGGER IF EXISTS expenses_fts_update;
+DROP TABLE IF EXISTS expenses_fts;
+"""
+
+
+def init_search(conn: sqlite3.Connection) -> None:
+    """Creates the index and its triggers, backfilling it on first creation."""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expenses_fts'"
+    ).fetchone()
+    conn.executescript(SEARCH_SCHEMA)
+    if not existed:
+        rebuild(conn)
+
+
+def rebuild(conn: sqlite3.Connection) -> None:
+    """Re-reads every description and category from the expenses table."""
+    with conn:
+        conn.execute("INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')")
+
+
+def check(conn: sqlite3.Connection) -> bool:
+    """True when the index matches the expenses table."""
+    try:
+        conn.execute("INSERT INTO expenses_fts (expenses_fts, rank) VALUES ('integrity-check', 1)")
+    except sqlite3.DatabaseError:
+        return False
+    return True
+
+
+def match_query(text: str) -> str | None:
+    """
+    Turns free text into an FTS5 query in which every word must match as a
+    prefix ("groc nov" finds "Groceries for the month of November").
+    Operators and quotes in the input are treated as plain text.
+    Returns None when the text has no searchable words.
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def main() -> None:
+    from . import storage
+    from .web_app import DATA_FILE
+
+    parser = argparse.ArgumentParser(description="Rebuild or check the expense search index.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--data-file", default=str(DATA_FILE), help="expenses CSV/DB path")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        storage.rebuild_search_index(args.data_file)
+        print("Search index rebuilt.")
+        return
+
+    ok = storage.check_search_index(args.data_file)
+    print("Search index is consistent." if ok else "Search index is out of date; run rebuild.")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
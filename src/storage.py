@@ -1,41 +1,155 @@
+import atexit
 import csv
+import heapq
+import json
+import logging
+import os
 import sqlite3
-from datetime import datetime
+import tempfile
+import threading
+import time
+import weakref
+from datetime import date
+from operator import itemgetter
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 from uuid import uuid4
 
-from .models import Expense
+from . import partitions, rollups, search
+from .instrumentation import phase, timed
+from .models import (
+    Expense,
+    ExpenseFilter,
+    format_cents,
+    from_cents,
+    parse_iso_date,
+    to_cents,
+)
 
 
-DATE_FORMAT = "%Y-%m-%d"
+logger = logging.getLogger(__name__)
+
+# Applied to every pooled connection. WAL lets readers run alongside a writer,
+# and synchronous=NORMAL is safe in WAL mode while skipping most fsyncs.
+PRAGMAS: Dict[str, object] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -16000,  # negative values are KiB, so roughly 16 MB
+}
 
 
 def _db_path_from_csv(csv_path: str) -> Path:
     return Path(csv_path).with_suffix(".db")
 
 
+def database_path(path: str) -> Path:
+    return _db_path_from_csv(path).resolve()
+
+
+EXPENSES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    amount_cents INTEGER NOT NULL
+)
+"""
+SCHEMA_VERSION = 4
+
+
+def _expense_columns(conn: sqlite3.Connection) -> set[str]:
+    return {row[1] for row in conn.execute("PRAGMA table_info(expenses)")}
+
+
+def _migrate_to_cents(conn: sqlite3.Connection) -> None:
+    """
+    Converts a database from the original REAL `amount` column to integer
+    `amount_cents`. Amounts are rounded to the cent on their decimal value,
+    and the rollups are dropped so init_rollups() backfills them in cents
+    (likewise the search index, which refers to the old table's rowids).
+
+    It runs as one explicit transaction: the sqlite3 module would otherwise
+    commit the DDL statement by statement, and a failure halfway (say, an
+    amount that is not a number) would strand the data in a renamed table.
+    """
+    if "amount" not in _expense_columns(conn):
+        return
+    conn.commit()
+    isolation_level, conn.isolation_level = conn.isolation_level, None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while this one waited for the lock.
+            if "amount" in _expense_columns(conn):
+                logger.info("Migrating expenses to integer cents")
+                _copy_to_cents(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def _copy_to_cents(conn: sqlite3.Connection) -> None:
+    for trigger in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS expenses_rollup_{trigger}")
+    conn.execute("DROP TABLE IF EXISTS daily_totals")
+    conn.execute("DROP TABLE IF EXISTS monthly_totals")
+    # One statement at a time: executescript() would commit first.
+    for statement in search.DROP_SEARCH.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    conn.execute("DROP INDEX IF EXISTS idx_expenses_category_amount")
+    conn.execute("ALTER TABLE expenses RENAME TO expenses_real")
+    conn.execute(EXPENSES_SCHEMA)
+    rows = conn.execute(
+        "SELECT id, date, category, description, amount FROM expenses_real"
+    ).fetchall()
+    conn.executemany(
+        "INSERT INTO expenses (id, date, category, description, amount_cents) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(r[0], r[1], r[2], r[3] or "", to_cents(r[4])) for r in rows],
+    )
+    conn.execute("DROP TABLE expenses_real")
+
+
 def _init_db(conn: sqlite3.Connection) -> None:
+    _migrate_to_cents(conn)
+    conn.execute(EXPENSES_SCHEMA)
+    # (date, id) serves date-range scans and the keyset order used by page_expenses.
+    conn.execute("DROP INDEX IF EXISTS idx_expenses_date")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date_id ON expenses (date, id)")
     conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS expenses (
-            id TEXT PRIMARY KEY,
-            date TEXT NOT NULL,
-            category TEXT NOT NULL,
-            description TEXT NOT NULL DEFAULT '',
-            amount REAL NOT NULL
-        )
-        """
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses (category, date)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_amount ON expenses (category, amount_cents)"
+    )
+    # data_version is bumped by every write so caches in other processes can detect staleness.
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+    )
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', 0)")
+    # A random id per database file, so a recreated database whose data_version
+    # starts again at 0 is still told apart from the one it replaced.
+    conn.execute(
+        "INSERT OR IGNORE INTO meta (key, value) VALUES ('database_id', ?)", (uuid4().int >> 65,)
     )
+    conn.execute(partitions.ARCHIVES_SCHEMA)
     conn.commit()
+    rollups.init_rollups(conn)
+    search.init_search(conn)
 
 
 def _row_to_expense(row: sqlite3.Row) -> Expense:
-    expense_date = datetime.strptime(row["date"], DATE_FORMAT).date()
-    return Expense(
-        date=expense_date,
+    # Stored dates are always YYYY-MM-DD, so fromisoformat is safe and far cheaper than strptime.
+    return Expense.from_stored(
+        date=date.fromisoformat(row["date"]),
         category=row["category"],
-        amount=float(row["amount"]),
+        cents=row["amount_cents"],
         description=row["description"] or "",
         id=row["id"],
     )
@@ -50,107 +164,1030 @@ def _load_from_csv(csv_path: Path) -> List[Expense]:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                expense_date = datetime.strptime(row["date"], DATE_FORMAT).date()
+                expense_date = parse_iso_date(row["date"])
                 category = row["category"]
-                amount = float(row["amount"])
+                # Round on the decimal string, as storage would, rather than via float.
+                cents = to_cents(row["amount"])
                 description = row.get("description", "")
                 expense_id = row.get("id") or uuid4().hex
                 expenses.append(
-                    Expense(
+                    Expense.from_stored(
                         date=expense_date,
                         category=category,
-                        amount=amount,
+                        cents=cents,
                         description=description,
                         id=expense_id,
                     )
                 )
-            except (KeyError, ValueError):
+            except (KeyError, TypeError, ValueError):  # short rows yield None fields
                 continue
     return expenses
 
 
-def _write_csv(csv_path: Path, expenses: Iterable[Expense]) -> None:
+def _expense_to_row(expense: Expense) -> Tuple[str, str, str, str, int]:
+    return (
+        expense.id,
+        expense.date.isoformat(),
+        expense.category,
+        expense.description,
+        expense.cents,
+    )
+
+
+CSV_FIELDNAMES = ["id", "date", "category", "description", "amount"]
+SELECT_COLUMNS = "id, date, category, description, amount_cents"
+
+
+def _csv_record(row: Tuple[str, str, str, str, int]) -> List[str]:
+    expense_id, expense_date, category, description, cents = row
+    return [expense_id, expense_date, category, description, format_cents(cents)]
+
+
+def _write_csv(csv_path: Path, rows: Iterable[Tuple[str, str, str, str, int]]) -> None:
+    """Writes to a temporary file first so readers never see a partial snapshot."""
     csv_path.parent.mkdir(parents=True, exist_ok=True)
-    with csv_path.open("w", newline="", encoding="utf-8") as f:
-        fieldnames = ["id", "date", "category", "description", "amount"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for e in expenses:
-            writer.writerow(
-                {
-                    "id": e.id,
-                    "date": e.date.strftime(DATE_FORMAT),
-                    "category": e.category,
-                    "description": e.description,
-                    "amount": f"{e.amount:.2f}",
-                }
-            )
+    fd, tmp_name = tempfile.mkstemp(dir=csv_path.parent, prefix=f".{csv_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(_csv_record(row) for row in rows)
+        os.replace(tmp_name, csv_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
 
 
-def load_expenses(path: str) -> List[Expense]:
-    csv_path = Path(path)
-    db_path = _db_path_from_csv(path)
+def _export_csv(conn: sqlite3.Connection, csv_path: Path) -> None:
+    """Rewrite the CSV snapshot straight from the table, without building Expense objects."""
+    cursor = conn.execute(f"SELECT {SELECT_COLUMNS} FROM expenses ORDER BY date DESC")
+    _write_csv(csv_path, (tuple(row) for row in cursor))
+
+
+class CsvExporter:
+    """
+    Rewrites CSV snapshots on a background thread so requests don't wait for them.
+
+    A snapshot is written `delay` seconds after the last write that asked for
+    it, so a burst of mutations produces a single export; `max_delay` bounds how
+    long a steady stream of writes can postpone it. flush() exports everything
+    pending in the calling thread and is registered to run at interpreter exit.
+    """
+
+    def __init__(self, delay: float = 0.5, max_delay: float = 5.0):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        # csv path -> (first requested, deadline), both time.monotonic() values
+        self._pending: Dict[Path, Tuple[float, float]] = {}
+        self._in_flight = 0  # exports the background thread has taken off _pending
+        self._export_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, csv_path: Path) -> None:
+        now = time.monotonic()
+        with self._cond:
+            first, _ = self._pending.get(csv_path, (now, now))
+            self._pending[csv_path] = (first, min(now + self.delay, first + self.max_delay))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="csv-exporter", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        with self._cond:
+            paths = list(self._pending)
+            self._pending.clear()
+        for csv_path in paths:
+            self._export(csv_path)
+        # Wait for an export the background thread has started, or is about to.
+        with self._cond:
+            while self._in_flight:
+                self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                csv_path, (_, deadline) = min(self._pending.items(), key=lambda kv: kv[1][1])
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                del self._pending[csv_path]
+                self._in_flight += 1
+            try:
+                self._export(csv_path)
+            except Exception:
+                logger.exception("CSV export to %s failed", csv_path)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _export(self, csv_path: Path) -> None:
+        with self._export_lock:
+            _export_csv(_connect(str(csv_path)), csv_path)
+
+
+class _ThreadConnections:
+    """
+    One thread's connections by database path. Only the thread-local storage
+    holds it strongly, so when the thread ends it is dropped and its
+    connections are closed. A forked child never closes its parent's.
+    """
+
+    def __init__(self) -> None:
+        self.by_path: Dict[Path, sqlite3.Connection] = {}
+        self.pid = os.getpid()
+
+    def close(self) -> None:
+        connections = list(self.by_path.values())
+        self.by_path.clear()
+        for conn in connections:
+            conn.close()
+
+    def __del__(self) -> None:
+        if os.getpid() == self.pid:
+            self.close()
+
+
+class ConnectionPool:
+    """
+    Keeps one long-lived connection per thread and database file, closed when
+    the thread ends. The schema is initialised once per process for each
+    database; a forked worker (e.g. gunicorn) opens its own connections.
+    Read-only connections (archived years) skip the schema and journal setup.
+    """
+
+    def __init__(self, pragmas: Dict[str, object] | None = None):
+        self.pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized: set[Path] = set()
+        self._threads: weakref.WeakSet[_ThreadConnections] = weakref.WeakSet()
+        self._pid = os.getpid()
+
+    def connection(self, db_path: Path, read_only: bool = False) -> sqlite3.Connection:
+        if os.getpid() != self._pid:
+            self._reset_after_fork()
+
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = _ThreadConnections()
+            with self._lock:
+                self._threads.add(connections)
+        conn = connections.by_path.get(db_path)
+        if conn is None:
+            conn = connections.by_path[db_path] = self._open(db_path, read_only)
+        return conn
+
+    def open_connections(self) -> List[sqlite3.Connection]:
+        """The connections of all live threads."""
+        with self._lock:
+            return [conn for connections in list(self._threads) for conn in connections.by_path.values()]
+
+    def close_all(self) -> None:
+        with self._lock:
+            threads, self._threads = list(self._threads), weakref.WeakSet()
+            self._initialized.clear()
+        for connections in threads:
+            connections.close()
+        self._local = threading.local()
+
+    def _open(self, db_path: Path, read_only: bool = False) -> sqlite3.Connection:
+        # Each connection is only ever used by the thread that opened it;
+        # check_same_thread is off so close_all() and the end-of-thread
+        # cleanup can close it from another thread.
+        if read_only:
+            conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            if read_only and name in ("journal_mode", "synchronous"):
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            if not read_only and db_path not in self._initialized:
+                _prepare_database(conn, db_path)
+                self._initialized.add(db_path)
+        return conn
+
+    def _reset_after_fork(self) -> None:
+        # The parent's connections stay referenced by _fork_inherited, so the
+        # child never closes them (closing would release the parent's locks).
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized = set()
+        self._threads = weakref.WeakSet()
+        self._pid = os.getpid()
 
+
+_pool = ConnectionPool()
+
+# SQLite connections must never be closed in a forked child, but the child
+# drops the thread-local storage of its parent's other threads, and garbage
+# collection would close whatever it held. Everything open at fork time is
+# therefore kept referenced for the child's lifetime.
+_fork_inherited: List[sqlite3.Connection] = []
+
+
+def _hold_connections_for_fork() -> None:
+    _fork_inherited[:] = _pool.open_connections()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_hold_connections_for_fork, after_in_parent=_fork_inherited.clear
+    )
+
+
+def configure_connections(**pragmas: object) -> None:
+    """
+    Overrides PRAGMA values (e.g. mmap_size=0) for connections opened from now on.
+    Existing pooled connections are closed.
+    """
+    global _pool
+    _pool.close_all()
+    _pool = ConnectionPool({**PRAGMAS, **pragmas})
+
+
+_csv_exporter = CsvExporter()
+atexit.register(_csv_exporter.flush)
+
+
+def flush_csv_exports() -> None:
+    """Writes any pending CSV snapshots now."""
+    _csv_exporter.flush()
+
+
+def close_connections() -> None:
+    _csv_exporter.flush()
+    _pool.close_all()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    with phase("connect"):
+        return _pool.connection(database_path(path))
+
+
+def _partition_years(
+    path: str, filters: ExpenseFilter | None = None
+) -> List[Tuple[int | None, sqlite3.Connection]]:
+    """
+    The partitions a read of `filters` has to cover: the live database (year
+    None), then each archived year whose dates overlap the filter's range,
+    newest first and opened read-only.
+    """
+    conn = _connect(path)
+    archives = conn.execute("SELECT year, file FROM archives ORDER BY year DESC").fetchall()
+    if not archives:
+        return [(None, conn)]
+    directory = database_path(path).parent
+    with phase("connect"):
+        return [(None, conn)] + [
+            (year, _pool.connection(directory / file, read_only=True))
+            for year, file in archives
+            if partitions.overlaps(year, filters)
+        ]
+
+
+def _partitions(path: str, filters: ExpenseFilter | None = None) -> List[sqlite3.Connection]:
+    return [conn for _, conn in _partition_years(path, filters)]
+
+
+# (date, id) of a row selected with SELECT_COLUMNS: the order rows are merged in.
+_ROW_KEY = itemgetter(1, 0)
+
+
+def _merge_rows(parts: List[list], reverse: bool = False) -> list:
+    """Merges per-partition row lists, each already sorted by (date, id)."""
+    if len(parts) == 1:
+        return parts[0]
+    return list(heapq.merge(*parts, key=_ROW_KEY, reverse=reverse))
+
+
+_write_listeners: List[Callable[[Path], None]] = []
+
+
+def add_write_listener(callback: Callable[[Path], None]) -> None:
+    """
+    Registers `callback` to be called with the database path after each
+    committed write made by this process.
+    """
+    _write_listeners.append(callback)
+
+
+def remove_write_listener(callback: Callable[[Path], None]) -> None:
+    """Unregisters a callback added with add_write_listener(), if present."""
+    try:
+        _write_listeners.remove(callback)
+    except ValueError:
+        pass
+
+
+def _bump_version(conn: sqlite3.Connection) -> None:
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+
+def _notify_write(path: str) -> None:
+    db_path = database_path(path)
+    for callback in tuple(_write_listeners):  # listeners may be removed meanwhile
+        callback(db_path)
+
+
+@timed("query")
+def data_version(path: str) -> int:
+    row = _connect(path).execute(
+        "SELECT value FROM meta WHERE key = 'data_version'"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+@timed("query")
+def database_id(path: str) -> int:
+    row = _connect(path).execute(
+        "SELECT value FROM meta WHERE key = 'database_id'"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def _prepare_database(conn: sqlite3.Connection, db_path: Path) -> None:
+    """
+    Creates or migrates the schema and seeds an empty table from the CSV
+    snapshot. A database already stamped with the current SCHEMA_VERSION
+    (see init_database) skips all of it, so a fresh process pays for one
+    PRAGMA read instead of the DDL.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return
+    _init_db(conn)
+    _seed_from_csv(conn, db_path.with_suffix(".csv"))
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def init_database(path: str) -> int:
+    """
+    Explicit one-time setup (schema, migrations, rollups, CSV seed) for the
+    database behind `path`, meant for a deploy or build step so requests
+    never do it. Safe to run repeatedly. Returns the number of expenses.
+    """
+    db_path = database_path(path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     try:
-        _init_db(conn)
-        count = conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
-        if count == 0:
-            seed_expenses = _load_from_csv(csv_path)
-            if seed_expenses:
-                conn.executemany(
-                    """
-                    INSERT OR REPLACE INTO expenses (id, date, category, description, amount)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    [
-                        (
-                            e.id,
-                            e.date.strftime(DATE_FORMAT),
-                            e.category,
-                            e.description,
-                            e.amount,
-                        )
-                        for e in seed_expenses
-                    ],
-                )
-                conn.commit()
-        rows = conn.execute(
-            "SELECT id, date, category, description, amount FROM expenses ORDER BY date DESC"
-        ).fetchall()
+        conn.execute(f"PRAGMA journal_mode = {PRAGMAS['journal_mode']}")
+        conn.execute("PRAGMA user_version = 0")
+        _prepare_database(conn, db_path)
+        return conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
     finally:
         conn.close()
 
-    return [_row_to_expense(row) for row in rows]
 
+def _seed_from_csv(conn: sqlite3.Connection, csv_path: Path) -> None:
+    count = conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+    if count:
+        return
+    seed_expenses = _load_from_csv(csv_path)
+    if seed_expenses:
+        with conn:
+            conn.executemany(
+                # An upsert rather than INSERT OR REPLACE: REPLACE deletes the old
+                # row without firing the delete trigger, which would skew the rollups.
+                """
+                INSERT INTO expenses (id, date, category, description, amount_cents)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    date = excluded.date,
+                    category = excluded.category,
+                    description = excluded.description,
+                    amount_cents = excluded.amount_cents
+                """,
+                [_expense_to_row(e) for e in seed_expenses],
+            )
+            _bump_version(conn)
 
-def save_expenses(path: str, expenses: List[Expense]) -> None:
-    csv_path = Path(path)
-    db_path = _db_path_from_csv(path)
 
-    conn = sqlite3.connect(db_path)
+def load_expenses(path: str) -> List[Expense]:
+    with phase("query"):
+        rows = _merge_rows(
+            [
+                conn.execute(
+                    f"SELECT {SELECT_COLUMNS} FROM expenses ORDER BY date DESC, id DESC"
+                ).fetchall()
+                for conn in _partitions(path)
+            ],
+            reverse=True,
+        )
+    with phase("convert"):
+        return [_row_to_expense(row) for row in rows]
+
+
+def _where_clause(filters: ExpenseFilter | None) -> Tuple[str, List[object]]:
+    """
+    Builds a WHERE clause for `filters`. Date bounds and category equality are
+    plain comparisons so the (date, id) and (category, date) indexes apply.
+    """
+    if filters is None or filters.is_empty():
+        return "", []
+    conditions: List[str] = []
+    params: List[object] = []
+    if filters.start is not None:
+        conditions.append("date >= ?")
+        params.append(filters.start.isoformat())
+    if filters.end is not None:
+        conditions.append("date <= ?")
+        params.append(filters.end.isoformat())
+    if filters.categories is not None:
+        placeholders = ", ".join("?" for _ in filters.categories)
+        conditions.append(f"category IN ({placeholders})")
+        params.extend(sorted(filters.categories))
+    return "WHERE " + " AND ".join(conditions), params
+
+
+def iter_expense_rows(
+    path: str, filters: ExpenseFilter | None = None, batch_size: int = 1000
+) -> Iterator[Tuple[str, str, str, str, int]]:
+    """
+    Yields (id, date, category, description, amount_cents) tuples in date order,
+    fetching `batch_size` rows at a time so memory use stays constant.
+    """
+    where, params = _where_clause(filters)
+    sql = f"SELECT {SELECT_COLUMNS} FROM expenses {where} ORDER BY date, id"
+    parts = [_iter_rows(conn, sql, params, batch_size) for conn in _partitions(path, filters)]
+    if len(parts) == 1:
+        yield from parts[0]
+    else:
+        yield from heapq.merge(*parts, key=_ROW_KEY)
+
+
+def _iter_rows(
+    conn: sqlite3.Connection, sql: str, params: List[object], batch_size: int
+) -> Iterator[Tuple[str, str, str, str, int]]:
+    cursor = conn.cursor()
+    cursor.row_factory = None
     try:
-        _init_db(conn)
-        conn.execute("DELETE FROM expenses")
-        conn.executemany(
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def _encode_cursor(row: sqlite3.Row) -> str:
+    return f"{row['date']}:{row['id']}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    expense_date, sep, expense_id = cursor.partition(":")
+    if not sep or not expense_id:
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    date.fromisoformat(expense_date)
+    return expense_date, expense_id
+
+
+def page_expenses(
+    path: str, limit: int, cursor: str | None = None, filters: ExpenseFilter | None = None
+) -> Tuple[List[Expense], str | None]:
+    """
+    Returns up to `limit` expenses, newest first, ordered by (date, id).
+    `cursor` is the opaque value returned with the previous page; the second
+    item of the result is the cursor for the next page, or None on the last one.
+    Each page is an index range scan, so its cost does not grow with history.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+
+    where, params = _where_clause(filters)
+    if cursor:
+        where = f"{where} AND (date, id) < (?, ?)" if where else "WHERE (date, id) < (?, ?)"
+        params.extend(_decode_cursor(cursor))
+    rows: list = []
+    with phase("query"):
+        for year, conn in _partition_years(path, filters):
+            # Archives come newest first: once a full page is newer than this
+            # year's last day, neither it nor any older one can contribute.
+            if year is not None and len(rows) > limit and rows[limit][1] > f"{year:04d}-12-31":
+                break
+            part = conn.execute(
+                f"""
+                SELECT {SELECT_COLUMNS} FROM expenses
+                {where}
+                ORDER BY date DESC, id DESC
+                LIMIT ?
+                """,
+                (*params, limit + 1),
+            ).fetchall()
+            rows = _merge_rows([rows, part], reverse=True)[: limit + 1] if rows else part
+
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    with phase("convert"):
+        return [_row_to_expense(row) for row in rows[:limit]], next_cursor
+
+
+def search_expenses(
+    path: str,
+    query: str,
+    limit: int,
+    cursor: str | None = None,
+    filters: ExpenseFilter | None = None,
+) -> Tuple[List[Expense], str | None]:
+    """
+    Full-text search over descriptions and categories, best match first
+    (bm25, ties newest first). Every word of `query` must match as a prefix.
+    Paginates like page_expenses(): `cursor` is the value returned with the
+    previous page, and None comes back on the last one. Each archived year has
+    its own index, so its scores are merged with the others' by value.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    offset = 0
+    if cursor:
+        if not cursor.isdigit():
+            raise ValueError(f"Invalid page cursor: {cursor!r}")
+        offset = int(cursor)
+    match = search.match_query(query)
+    if match is None:
+        return [], None
+
+    where, params = _where_clause(filters)
+    connections = _partitions(path, filters)
+    # With several partitions each must return everything up to the end of
+    # the page, and the offset is applied after merging.
+    merged = len(connections) > 1
+    fetch, skip = (offset + limit + 1, 0) if merged else (limit + 1, offset)
+    rows = []
+    with phase("query"):
+        for conn in connections:
+            rows += conn.execute(
+                f"""
+                WITH matches AS (
+                    SELECT rowid AS match_rowid, rank AS match_rank
+                    FROM expenses_fts WHERE expenses_fts MATCH ?
+                )
+                SELECT {SELECT_COLUMNS}, match_rank FROM matches
+                JOIN expenses ON expenses.rowid = matches.match_rowid
+                {where}
+                ORDER BY match_rank, date DESC, id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (match, *params, fetch, skip),
+            ).fetchall()
+        if merged:
+            rows.sort(key=_ROW_KEY, reverse=True)
+            rows.sort(key=itemgetter(5))
+            rows = rows[offset:]
+
+    next_cursor = str(offset + limit) if len(rows) > limit else None
+    with phase("convert"):
+        return [_row_to_expense(row) for row in rows[:limit]], next_cursor
+
+
+class _PendingWrite:
+    __slots__ = ("path", "op", "done", "result", "error")
+
+    def __init__(self, path: str, op: Callable[[sqlite3.Connection], int]):
+        self.path = path
+        self.op = op
+        self.done = threading.Event()
+        self.result = 0
+        self.error: BaseException | None = None
+
+
+class WriteQueue:
+    """
+    Group commit: writes submitted from any thread are collected for up to
+    `window` seconds (or until `max_batch` are waiting) and applied by one
+    writer thread in a single transaction. With the pool's WAL and
+    synchronous=NORMAL a commit doesn't fsync anyway; what a burst saves is
+    one BEGIN IMMEDIATE/COMMIT (and WAL frame append) per write and the
+    handoff of the write lock between request threads, which otherwise
+    sleep and retry in SQLite's busy handler.
+
+    Each write runs under its own savepoint, so a failing write is rolled
+    back and its exception re-raised in the submitting thread without
+    affecting the rest of the batch. submit() returns only after the batch
+    has committed and write listeners have run.
+    """
+
+    def __init__(self, window: float = 0.002, max_batch: int = 64):
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0  # committed transactions, for tests and tuning
+        self._cond = threading.Condition()
+        self._pending: List[_PendingWrite] = []
+        self._thread: threading.Thread | None = None
+
+    def submit(self, path: str, op: Callable[[sqlite3.Connection], int]) -> int:
+        write = _PendingWrite(path, op)
+        with self._cond:
+            self._pending.append(write)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+
+            groups: Dict[Path, List[_PendingWrite]] = {}
+            for write in batch:
+                groups.setdefault(database_path(write.path), []).append(write)
+            for writes in groups.values():
+                try:
+                    self._commit(writes)
+                except BaseException as exc:
+                    logger.exception("Group commit to %s failed", writes[0].path)
+                    for write in writes:
+                        write.result, write.error = 0, write.error or exc
+                finally:
+                    for write in writes:
+                        write.done.set()
+
+    def _commit(self, writes: List[_PendingWrite]) -> None:
+        path = writes[0].path
+        conn = _connect(path)
+        changed = 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for write in writes:
+                conn.execute("SAVEPOINT queued_write")
+                try:
+                    write.result = write.op(conn)
+                    changed += write.result
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO queued_write")
+                    write.error = exc
+                conn.execute("RELEASE queued_write")
+            if changed:
+                _bump_version(conn)
+        self.batches += 1
+        if changed:
+            _after_write(path)
+
+
+_write_queue: WriteQueue | None = None
+
+
+def enable_write_queue(window: float = 0.002, max_batch: int = 64) -> WriteQueue:
+    """
+    Routes every write function through a group-commit WriteQueue.
+    Writers block until their batch commits, so return values, exceptions
+    and read-your-writes behave as before; only the commit is shared.
+    """
+    global _write_queue
+    _write_queue = WriteQueue(window, max_batch)
+    return _write_queue
+
+
+def disable_write_queue() -> None:
+    global _write_queue
+    _write_queue = None
+
+
+def _after_write(path: str) -> None:
+    _notify_write(path)
+    _csv_exporter.schedule(Path(path))
+
+
+def _write(path: str, op: Callable[[sqlite3.Connection], int]) -> int:
+    """
+    Runs `op(conn)` in a write transaction and returns the number of rows it
+    reports changing. If any changed, the data version is bumped in the same
+    transaction and listeners and the CSV export follow the commit.
+    """
+    queue = _write_queue
+    if queue is not None:
+        return queue.submit(path, op)
+    conn = _connect(path)
+    with conn:
+        changed = op(conn)
+        if changed:
+            _bump_version(conn)
+    if changed:
+        _after_write(path)
+    return changed
+
+
+def _archived_ids(path: str, ids: List[str]) -> set[str]:
+    """The ids among `ids` that belong to archived (read-only) expenses."""
+    found: set[str] = set()
+    archives = _partitions(path)[1:]
+    if archives:
+        encoded = json.dumps(ids)
+        for conn in archives:
+            found.update(
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM expenses WHERE id IN (SELECT value FROM json_each(?))",
+                    (encoded,),
+                )
+            )
+    return found
+
+
+def _without_archived(path: str, rows: List[Tuple[str, str, str, str, int]]) -> list:
+    archived = _archived_ids(path, [row[0] for row in rows])
+    return [row for row in rows if row[0] not in archived] if archived else rows
+
+
+@timed("save")
+def save_expenses(path: str, expenses: List[Expense]) -> None:
+    """
+    Replaces the live expenses with `expenses`. Archived years are read-only,
+    so expenses that belong to an archive are left out.
+    """
+    rows = _without_archived(path, [_expense_to_row(e) for e in expenses])
+
+    def op(conn: sqlite3.Connection) -> int:
+        deleted = conn.execute("DELETE FROM expenses").rowcount
+        inserted = conn.executemany(
             """
-            INSERT INTO expenses (id, date, category, description, amount)
+            INSERT INTO expenses (id, date, category, description, amount_cents)
             VALUES (?, ?, ?, ?, ?)
             """,
-            [
-                (
-                    e.id,
-                    e.date.strftime(DATE_FORMAT),
-                    e.category,
-                    e.description,
-                    e.amount,
-                )
-                for e in expenses
-            ],
-        )
-        conn.commit()
+            rows,
+        ).rowcount
+        return deleted + inserted
+
+    _write(path, op)
+
+
+@timed("query")
+def get_expense(path: str, expense_id: str) -> Expense | None:
+    for conn in _partitions(path):
+        row = conn.execute(
+            f"SELECT {SELECT_COLUMNS} FROM expenses WHERE id = ?", (expense_id,)
+        ).fetchone()
+        if row:
+            return _row_to_expense(row)
+    return None
+
+
+@timed("save")
+def insert_expenses(path: str, expenses: Iterable[Expense]) -> int:
+    """
+    Inserts new expenses without touching existing rows.
+    Returns the number of rows inserted.
+    """
+    rows = [_expense_to_row(e) for e in expenses]
+    if not rows:
+        return 0
+
+    def op(conn: sqlite3.Connection) -> int:
+        return conn.executemany(
+            """
+            INSERT INTO expenses (id, date, category, description, amount_cents)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        ).rowcount
+
+    return _write(path, op)
+
+
+def insert_expense(path: str, expense: Expense) -> None:
+    insert_expenses(path, [expense])
+
+
+@timed("save")
+def insert_new_expenses(path: str, expenses: Iterable[Expense]) -> int:
+    """
+    Inserts the expenses in one transaction, skipping any whose id already
+    exists, archived years included. Returns the number of rows actually inserted.
+    """
+    rows = [_expense_to_row(e) for e in expenses]
+    if not rows:
+        return 0
+    rows = _without_archived(path, rows)
+
+    def op(conn: sqlite3.Connection) -> int:
+        # rowcount, unlike total_changes, leaves out rows written by the rollup triggers.
+        return conn.executemany(
+            """
+            INSERT OR IGNORE INTO expenses (id, date, category, description, amount_cents)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        ).rowcount
+
+    return _write(path, op)
+
+
+@timed("save")
+def update_expenses(path: str, expenses: Iterable[Expense]) -> int:
+    """
+    Writes the current field values of each expense to its existing row.
+    Returns the number of rows that were found and updated; archived
+    expenses are read-only and never are.
+    """
+    rows = [_expense_to_row(e) for e in expenses]
+    if not rows:
+        return 0
+
+    def op(conn: sqlite3.Connection) -> int:
+        updated = 0
+        for expense_id, expense_date, category, description, cents in rows:
+            cursor = conn.execute(
+                """
+                UPDATE expenses
+                SET date = ?, category = ?, description = ?, amount_cents = ?
+                WHERE id = ?
+                """,
+                (expense_date, category, description, cents, expense_id),
+            )
+            updated += cursor.rowcount
+        return updated
+
+    return _write(path, op)
+
+
+def update_expense(path: str, expense: Expense) -> bool:
+    return update_expenses(path, [expense]) == 1
+
+
+@timed("save")
+def remove_expenses(path: str, expense_ids: Iterable[str]) -> int:
+    """
+    Deletes the rows with the given ids.
+    Returns the number of rows that were found and removed.
+    """
+    ids = [(expense_id,) for expense_id in expense_ids]
+    if not ids:
+        return 0
+
+    def op(conn: sqlite3.Connection) -> int:
+        return sum(conn.execute("DELETE FROM expenses WHERE id = ?", params).rowcount for params in ids)
+
+    return _write(path, op)
+
+
+def remove_expense(path: str, expense_id: str) -> bool:
+    return remove_expenses(path, [expense_id]) == 1
+
+
+@timed("save")
+def rebuild_rollups(path: str) -> None:
+    conn = _connect(path)
+    rollups.rebuild(conn)
+    with conn:
+        _bump_version(conn)
+    _notify_write(path)
+
+
+def verify_rollups(path: str) -> List[str]:
+    return rollups.verify(_connect(path))
+
+
+def rebuild_search_index(path: str) -> None:
+    search.rebuild(_connect(path))
+
+
+def check_search_index(path: str) -> bool:
+    return search.check(_connect(path))
+
+
+def _rollup_source(filters: ExpenseFilter | None) -> Tuple[str, str, List[object]]:
+    """
+    Picks the smallest rollup table that can answer `filters`: monthly_totals
+    unless a date bound is set, in which case daily_totals is needed.
+    """
+    where, params = _where_clause(filters)
+    if filters is None or (filters.start is None and filters.end is None):
+        return "monthly_totals", where, params
+    return "daily_totals", where, params
+
+
+def _sum_groups(
+    path: str, filters: ExpenseFilter | None, sql: str, params: List[object]
+) -> Dict[str, int]:
+    """
+    Runs a `SELECT key, SUM(...) ... GROUP BY key` query on every partition
+    `filters` reaches and adds up the sums per key, returned in key order.
+    """
+    totals: Dict[str, int] = {}
+    for conn in _partitions(path, filters):
+        for key, cents in conn.execute(sql, params):
+            totals[key] = totals.get(key, 0) + cents
+    return dict(sorted(totals.items()))
+
+
+@timed("query")
+def total_amount(path: str, filters: ExpenseFilter | None = None) -> float:
+    table, where, params = _rollup_source(filters)
+    cents = 0
+    for conn in _partitions(path, filters):
+        row = conn.execute(f"SELECT SUM(total_cents) FROM {table} {where}", params).fetchone()
+        cents += row[0] or 0
+    return from_cents(cents)
+
+
+@timed("query")
+def totals_by_category(path: str, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+    table, where, params = _rollup_source(filters)
+    sql = f"SELECT category, SUM(total_cents) FROM {table} {where} GROUP BY category"
+    totals = _sum_groups(path, filters, sql, params)
+    return {category: from_cents(cents) for category, cents in totals.items()}
+
+
+@timed("query")
+def totals_by_date(path: str, filters: ExpenseFilter | None = None) -> Dict[date, float]:
+    where, params = _where_clause(filters)
+    sql = f"SELECT date, SUM(total_cents) FROM daily_totals {where} GROUP BY date"
+    totals = _sum_groups(path, filters, sql, params)
+    return {date.fromisoformat(day): from_cents(cents) for day, cents in totals.items()}
+
+
+@timed("query")
+def totals_by_month(path: str, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+    table, where, params = _rollup_source(filters)
+    month = "month" if table == "monthly_totals" else "substr(date, 1, 7)"
+    totals = _sum_groups(
+        path,
+        filters,
+        f"""
+        SELECT {month} AS month_key, SUM(total_cents)
+        FROM {table}
+        {where}
+        GROUP BY month_key
+        """,
+        params,
+    )
+    return {month_key: from_cents(cents) for month_key, cents in totals.items()}
+
+
+def archive_path(path: str, year: int) -> Path:
+    db_path = database_path(path)
+    return db_path.with_name(f"{db_path.stem}.{year}.db")
+
+
+@timed("save")
+def archive_year(path: str, year: int) -> int:
+    """
+    Moves the expenses of a closed (past) year into their own read-only
+    database, with its own rollups and search index, and writes that
+    year's CSV snapshot beside it. Reads keep returning them; the live
+    database and its CSV snapshot shrink. Returns the number moved.
+    """
+    partitions.check_closed(year)
+    _connect(path)  # creates or migrates the live database first
+    target = archive_path(path, year)
+    conn = sqlite3.connect(target)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            _init_db(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
     finally:
         conn.close()
 
-    _write_csv(csv_path, expenses)
+    # A connection of its own: the archive stays attached for this move only.
+    conn = sqlite3.connect(database_path(path), isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (str(target),))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            moved = partitions.move_year(conn, year, target.name)
+            _bump_version(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("DETACH DATABASE archive")
+    finally:
+        conn.close()
+
+    _export_csv(_pool.connection(target, read_only=True), target.with_suffix(".csv"))
+    _after_write(path)
+    return moved
+
+
+def list_archives(path: str) -> List[Tuple[int, int, int]]:
+    """(year, expense count, total cents) of each archived year, oldest first."""
+    rows = _connect(path).execute(
+        "SELECT year, row_count, total_cents FROM archives ORDER BY year"
+    ).fetchall()
+    return [tuple(row) for row in rows]
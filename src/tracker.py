@@ -1,66 +1,193 @@
-from collections import defaultdict
+from bisect import bisect_left, bisect_right, insort
 from datetime import date
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Hashable, Iterator, List, Tuple
 
-from .models import Expense
+from . import storage
+from .models import Expense, ExpenseFilter, from_cents
+
+
+def _highest_and_lowest(
+    totals: Dict[str, float],
+) -> Tuple[Tuple[str, float] | None, Tuple[str, float] | None]:
+    if not totals:
+        return None, None
+
+    highest = max(totals.items(), key=lambda kv: kv[1])
+    lowest = min(totals.items(), key=lambda kv: kv[1])
+    return highest, lowest
+
+
+def _month_key(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+class _GroupTotals:
+    """
+    Running per-key totals in integer cents that drop a key once its last
+    expense is removed. Integer sums never drift, however many updates run.
+    """
+
+    def __init__(self) -> None:
+        self.totals: Dict[Hashable, int] = {}
+        self.counts: Dict[Hashable, int] = {}
+
+    def add(self, key: Hashable, cents: int) -> None:
+        self.totals[key] = self.totals.get(key, 0) + cents
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def remove(self, key: Hashable, cents: int) -> None:
+        count = self.counts[key] - 1
+        if count:
+            self.counts[key] = count
+            self.totals[key] -= cents
+        else:
+            del self.counts[key]
+            del self.totals[key]
 
 
 class ExpenseTracker:
+    """
+    In-memory tracker that keeps per-category, per-day and per-month totals
+    up to date as expenses are added, updated or deleted, so every aggregate
+    query costs O(groups) rather than O(expenses).
+
+    Expenses are indexed by id for O(1) lookup, and a sorted (date, id) key
+    list supports ordered iteration by date. Keeping that list sorted costs
+    an O(log N) search plus an O(N) shift of the list per add, update or
+    delete; the shift is a memmove of N pointers, tens of microseconds at
+    100k expenses. Building a tracker sorts once instead.
+
+    Mutate expenses through the tracker's methods; changes made directly to
+    an Expense's fields are not reflected in the totals.
+    """
+
     def __init__(self, expenses: List[Expense] | None = None):
-        self.expenses: List[Expense] = expenses or []
+        self._by_id: Dict[str, Expense] = {}
+        self._order: List[Tuple[date, str]] = []
+        self._total = 0
+        self._by_category = _GroupTotals()
+        self._by_date = _GroupTotals()
+        self._by_month = _GroupTotals()
+        for e in expenses or []:
+            self._by_id[e.id] = e  # a later expense with the same id replaces the earlier
+        for e in self._by_id.values():
+            self._add_totals(e)
+        self._order = sorted((e.date, e.id) for e in self._by_id.values())
+
+    @property
+    def expenses(self) -> List[Expense]:
+        """A snapshot of all expenses in insertion order."""
+        return list(self._by_id.values())
+
+    def iter_by_date(self, reverse: bool = False) -> Iterator[Expense]:
+        keys = reversed(self._order) if reverse else iter(self._order)
+        for _, expense_id in keys:
+            yield self._by_id[expense_id]
+
+    def _select(self, filters: ExpenseFilter) -> Iterator[Expense]:
+        # Only the slice of the date order inside the range is visited.
+        lo = 0 if filters.start is None else bisect_left(self._order, filters.start, key=lambda k: k[0])
+        hi = (
+            len(self._order)
+            if filters.end is None
+            else bisect_right(self._order, filters.end, key=lambda k: k[0])
+        )
+        for _, expense_id in self._order[lo:hi]:
+            expense = self._by_id[expense_id]
+            if filters.categories is None or expense.category in filters.categories:
+                yield expense
+
+    def _sum_by(self, filters: ExpenseFilter, key: Callable[[Expense], Hashable]) -> Dict[Hashable, float]:
+        totals: Dict[Hashable, int] = {}
+        for e in self._select(filters):
+            k = key(e)
+            totals[k] = totals.get(k, 0) + e.cents
+        return {k: from_cents(cents) for k, cents in totals.items()}
+
+    def _include(self, expense: Expense) -> None:
+        insort(self._order, (expense.date, expense.id))
+        self._add_totals(expense)
+
+    def _add_totals(self, expense: Expense) -> None:
+        cents = expense.cents
+        self._total += cents
+        self._by_category.add(expense.category, cents)
+        self._by_date.add(expense.date, cents)
+        self._by_month.add(_month_key(expense.date), cents)
+
+    def _exclude(self, expense: Expense) -> None:
+        del self._order[bisect_left(self._order, (expense.date, expense.id))]
+        cents = expense.cents
+        self._total -= cents
+        self._by_category.remove(expense.category, cents)
+        self._by_date.remove(expense.date, cents)
+        self._by_month.remove(_month_key(expense.date), cents)
 
     def add_expense(self, expense: Expense) -> None:
-        self.expenses.append(expense)
+        """Adds `expense`, replacing any existing expense with the same id."""
+        existing = self._by_id.get(expense.id)
+        if existing is not None:
+            self._exclude(existing)
+        self._by_id[expense.id] = expense
+        self._include(expense)
+
+    # Without filters the running totals answer directly; with filters only the
+    # matching date slice is scanned.
 
-    def total_expense(self) -> float:
-        return sum(e.amount for e in self.expenses)
+    def total_expense(self, filters: ExpenseFilter | None = None) -> float:
+        if filters is not None and not filters.is_empty():
+            return from_cents(sum(e.cents for e in self._select(filters)))
+        return from_cents(self._total)
 
-    def total_by_category(self) -> Dict[str, float]:
-        totals: Dict[str, float] = defaultdict(float)
-        for e in self.expenses:
-            totals[e.category] += e.amount
-        return dict(totals)
+    def total_by_category(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+        if filters is not None and not filters.is_empty():
+            return self._sum_by(filters, lambda e: e.category)
+        return {k: from_cents(cents) for k, cents in self._by_category.totals.items()}
 
-    def highest_and_lowest_category(self) -> Tuple[Tuple[str, float] | None, Tuple[str, float] | None]:
+    def highest_and_lowest_category(
+        self, filters: ExpenseFilter | None = None
+    ) -> Tuple[Tuple[str, float] | None, Tuple[str, float] | None]:
         """
         Returns (highest_category_with_total, lowest_category_with_total).
         Each entry is a tuple of (category_name, total_amount).
         If there are no expenses, returns (None, None).
         """
-        totals = self.total_by_category()
-        if not totals:
-            return None, None
+        return _highest_and_lowest(self.total_by_category(filters))
 
-        highest = max(totals.items(), key=lambda kv: kv[1])
-        lowest = min(totals.items(), key=lambda kv: kv[1])
-        return highest, lowest
-
-    def trend_by_date(self) -> Dict[date, float]:
+    def trend_by_date(self, filters: ExpenseFilter | None = None) -> Dict[date, float]:
         """
         Returns a dict of date -> total amount for that date,
         sorted by date when iterated over.
         """
-        totals: Dict[date, float] = defaultdict(float)
-        for e in self.expenses:
-            totals[e.date] += e.amount
+        if filters is not None and not filters.is_empty():
+            # _select walks the date order, so the totals come out sorted already
+            return self._sum_by(filters, lambda e: e.date)
         # Return as a normal dict but sorted by date for predictable output
-        return dict(sorted(totals.items(), key=lambda kv: kv[0]))
+        return {k: from_cents(cents) for k, cents in sorted(self._by_date.totals.items())}
 
-    def total_by_month(self) -> Dict[str, float]:
+    def total_by_month(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
         """
         Returns totals grouped by YYYY-MM. in chart.js
         """
-        totals: Dict[str, float] = defaultdict(float)
-        for e in self.expenses:
-            key = e.date.strftime("%Y-%m")
-            totals[key] += e.amount
-        return dict(sorted(totals.items(), key=lambda kv: kv[0]))
+        if filters is not None and not filters.is_empty():
+            return self._sum_by(filters, lambda e: _month_key(e.date))
+        return {k: from_cents(cents) for k, cents in sorted(self._by_month.totals.items())}
+
+    def check_consistency(self) -> bool:
+        """
+        Recomputes every aggregate from `expenses` and compares it with the
+        running totals. The totals are integer cents, so they must match exactly.
+        """
+        fresh = ExpenseTracker(self.expenses)
+        return (
+            self._total == fresh._total
+            and self._by_category.totals == fresh._by_category.totals
+            and self._by_date.totals == fresh._by_date.totals
+            and self._by_month.totals == fresh._by_month.totals
+        )
 
     def get_expense(self, expense_id: str) -> Expense | None:
-        for expense in self.expenses:
-            if expense.id == expense_id:
-                return expense
-        return None
+        return self._by_id.get(expense_id)
 
     def update_expense(
         self, expense_id: str, *, date: date, category: str, amount: float, description: str
@@ -68,15 +195,45 @@ class ExpenseTracker:
         expense = self.get_expense(expense_id)
         if not expense:
             return False
+        self._exclude(expense)
         expense.date = date
         expense.category = category
         expense.amount = amount
         expense.description = description
+        self._include(expense)
         return True
 
     def delete_expense(self, expense_id: str) -> bool:
-        for idx, expense in enumerate(self.expenses):
-            if expense.id == expense_id:
-                del self.expenses[idx]
-                return True
-        return False
+        expense = self._by_id.pop(expense_id, None)
+        if expense is None:
+            return False
+        self._exclude(expense)
+        return True
+
+
+class SqlExpenseTracker:
+    """
+    Read-only tracker whose aggregates are computed by SQLite.
+    Nothing is loaded into memory, so the cost of each query depends on
+    the number of groups returned rather than the number of expenses.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def total_expense(self, filters: ExpenseFilter | None = None) -> float:
+        return storage.total_amount(self.path, filters)
+
+    def total_by_category(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+        return storage.totals_by_category(self.path, filters)
+
+    def highest_and_lowest_category(
+        self, filters: ExpenseFilter | None = None
+    ) -> Tuple[Tuple[str, float] | None, Tuple[str, float] | None]:
+        return _highest_and_lowest(self.total_by_category(filters))
+
+    def trend_by_date(self, filters: ExpenseFilter | None = None) -> Dict[date, float]:
+        return storage.totals_by_date(self.path, filters)
+
+    def total_by_month(self, filters: ExpenseFilter | None = None) -> Dict[str, float]:
+        return storage.totals_by_month(self.path, filters)
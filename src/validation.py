@@ -0,0 +1,67 @@
+from datetime import date
+
+try:
+    from models import parse_iso_date, to_cents
+except ModuleNotFoundError:
+    from .models import parse_iso_date, to_cents
+
+
+CATEGORIES = [
+    "Food",
+    "Housing",
+    "Travel",
+    "Entertainment",
+    "Utilities",
+    "Health",
+    "Transportation",
+    "Other",
+]
+
+
+def parse_date(date_str: str) -> date:
+    if not date_str.strip():
+        return date.today()
+    return parse_iso_date(date_str)
+
+
+def process_expense_form(form_data: dict[str, str]):
+    values = {
+        "category": form_data.get("category", "").strip(),
+        "amount": form_data.get("amount", "").strip(),
+        "date": form_data.get("date", "").strip(),
+        "description": form_data.get("description", "").strip(),
+    }
+
+    error = None
+    try:
+        amount_value = float(values["amount"])
+        # to_cents rejects inf, nan and amounts too large to store; anything
+        # that rounds to 0 cents is not positive either.
+        if to_cents(amount_value) <= 0:
+            raise ValueError
+    except ValueError:
+        amount_value = None
+        error = error or "Amount must be a positive number."
+
+    if not values["category"]:
+        error = error or "Category is required."
+    elif values["category"] not in CATEGORIES:
+        error = error or "Please choose a category from the list."
+
+    try:
+        date_value = parse_date(values["date"])
+        if date_value > date.today():
+            raise ValueError
+    except ValueError:
+        date_value = None
+        error = error or "Date cannot be in the future. Use today or earlier."
+
+    if error:
+        return values, None, error
+
+    return values, {
+        "category": values["category"],
+        "amount": amount_value,
+        "date": date_value,
+        "description": values["description"],
+    }, None
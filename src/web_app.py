@@ -1,89 +1,200 @@
-from datetime import datetime, date
+import csv
+import io
+import json
+import logging
+import os
+import threading
+from datetime import date
+from itertools import islice
 from pathlib import Path
+from typing import Callable, Iterator
 
-from flask import Flask, abort, redirect, render_template, request, url_for
+from flask import Flask, Response, abort, jsonify, redirect, render_template, request, url_for
+from jinja2 import ChoiceLoader, ModuleLoader
 
 try:
-    from tracker import ExpenseTracker
-    from models import Expense
-    from storage import load_expenses, save_expenses
+    from cache import CachedTracker
+    from downsample import MIN_POINTS, bucket_by_period, downsample_daily, downsample_monthly
+    from instrumentation import format_metric, init_app, phase
+    from tracker import SqlExpenseTracker
+    from models import Expense, ExpenseFilter, format_cents, from_cents
+    from validation import CATEGORIES, process_expense_form
+    from storage import (
+        data_version,
+        database_id,
+        database_path,
+        enable_write_queue,
+        get_expense,
+        init_database,
+        insert_expense,
+        iter_expense_rows,
+        page_expenses,
+        search_expenses,
+        remove_expense,
+        update_expense,
+    )
 except ModuleNotFoundError:
-    from .tracker import ExpenseTracker
-    from .models import Expense
-    from .storage import load_expenses, save_expenses
+    from .cache import CachedTracker
+    from .downsample import MIN_POINTS, bucket_by_period, downsample_daily, downsample_monthly
+    from .instrumentation import format_metric, init_app, phase
+    from .tracker import SqlExpenseTracker
+    from .models import Expense, ExpenseFilter, format_cents, from_cents
+    from .validation import CATEGORIES, process_expense_form
+    from .storage import (
+        data_version,
+        database_id,
+        database_path,
+        enable_write_queue,
+        get_expense,
+        init_database,
+        insert_expense,
+        iter_expense_rows,
+        page_expenses,
+        search_expenses,
+        remove_expense,
+        update_expense,
+    )
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_FILE = BASE_DIR / "data" / "expenses.csv"
-CATEGORIES = [
-    "Food",
-    "Housing",
-    "Travel",
-    "Entertainment",
-    "Utilities",
-    "Health",
-    "Transportation",
-    "Other",
-]
+DATA_FILE = Path(os.environ.get("EXPENSE_TRACKER_DATA_FILE", BASE_DIR / "data" / "expenses.csv"))
+COMPILED_TEMPLATES_DIR = Path(
+    os.environ.get("EXPENSE_TRACKER_COMPILED_TEMPLATES", BASE_DIR / "build" / "templates")
+)
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+EXPORT_BATCH_SIZE = 1000
+ARCHIVED_ERROR = "Expenses in archived years are read-only."
+# Trend series on the dashboard are bounded, however long the history:
+TREND_TABLE_ROWS = 90  # most rows in the trend table; longer ranges get coarser periods
+CHART_POINTS = 120  # monthly chart points kept by LTTB downsampling
+MAX_POINTS = 5000
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Group commit for bursts of submissions, e.g. EXPENSE_TRACKER_WRITE_WINDOW_MS=2.
+if os.environ.get("EXPENSE_TRACKER_WRITE_WINDOW_MS"):
+    enable_write_queue(
+        window=float(os.environ["EXPENSE_TRACKER_WRITE_WINDOW_MS"]) / 1000,
+        max_batch=int(os.environ.get("EXPENSE_TRACKER_WRITE_BATCH", "64")),
+    )
+_summary_trackers: dict[str, CachedTracker] = {}
+_summary_trackers_lock = threading.Lock()
 
-def load_tracker() -> ExpenseTracker:
-    expenses = load_expenses(str(DATA_FILE))
-    return ExpenseTracker(expenses)
 
+def summary_tracker() -> CachedTracker:
+    path = str(DATA_FILE)
+    tracker = _summary_trackers.get(path)
+    if tracker is None:
+        # Created under the lock: each CachedTracker registers a write
+        # listener, so one built by a losing thread would never be released.
+        with _summary_trackers_lock:
+            tracker = _summary_trackers.get(path)
+            if tracker is None:
+                tracker = _summary_trackers[path] = CachedTracker(SqlExpenseTracker(path), path)
+    return tracker
 
-def parse_date(date_str: str) -> date:
-    if not date_str.strip():
-        return date.today()
-    return datetime.strptime(date_str, "%Y-%m-%d").date()
 
+def cache_metrics() -> list[str]:
+    stats = [({"path": path}, tracker.stats()) for path, tracker in _summary_trackers.items()]
+    return (
+        format_metric(
+            "expense_tracker_cache_hits_total",
+            "counter",
+            "Summary cache hits.",
+            ((labels, s["hits"]) for labels, s in stats),
+        )
+        + format_metric(
+            "expense_tracker_cache_misses_total",
+            "counter",
+            "Summary cache misses.",
+            ((labels, s["misses"]) for labels, s in stats),
+        )
+        + format_metric(
+            "expense_tracker_cache_entries",
+            "gauge",
+            "Aggregates currently cached.",
+            ((labels, s["entries"]) for labels, s in stats),
+        )
+    )
 
-def process_expense_form(form_data: dict[str, str]):
-    values = {
-        "category": form_data.get("category", "").strip(),
-        "amount": form_data.get("amount", "").strip(),
-        "date": form_data.get("date", "").strip(),
-        "description": form_data.get("description", "").strip(),
-    }
 
-    error = None
+init_app(app, metric_sources=[cache_metrics])
+
+
+def render(template: str, **context) -> str:
+    with phase("render"):
+        return render_template(template, **context)
+
+
+def parse_page_size(value: str | None) -> int:
     try:
-        amount_value = float(values["amount"])
-        if amount_value <= 0:
-            raise ValueError
+        page_size = int(value) if value else DEFAULT_PAGE_SIZE
     except ValueError:
-        amount_value = None
-        error = error or "Amount must be a positive number."
+        page_size = DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
 
-    if not values["category"]:
-        error = error or "Category is required."
-    elif values["category"] not in CATEGORIES:
-        error = error or "Please choose a category from the list."
 
+def parse_points(value: str | None, default: int | None = None) -> int | None:
+    """The `points` query argument, clamped to what LTTB can do; `default` if absent or malformed."""
     try:
-        date_value = parse_date(values["date"])
-        if date_value > date.today():
-            raise ValueError
+        points = int(value) if value else default
     except ValueError:
-        date_value = None
-        error = error or "Date cannot be in the future. Use today or earlier."
+        points = default
+    return None if points is None else max(MIN_POINTS, min(points, MAX_POINTS))
 
-    if error:
-        return values, None, error
 
-    return values, {
-        "category": values["category"],
-        "amount": amount_value,
-        "date": date_value,
-        "description": values["description"],
-    }, None
+def parse_filters(args) -> ExpenseFilter:
+    """
+    Reads `from`, `to` (YYYY-MM-DD) and repeated `category` query arguments.
+    Raises ValueError for a malformed date.
+    """
+    start = args.get("from", "").strip()
+    end = args.get("to", "").strip()
+    categories = frozenset(c for c in args.getlist("category") if c)
+    return ExpenseFilter(
+        start=date.fromisoformat(start) if start else None,
+        end=date.fromisoformat(end) if end else None,
+        categories=categories or None,
+    )
+
+
+def request_filters() -> ExpenseFilter:
+    try:
+        return parse_filters(request.args)
+    except ValueError:
+        abort(400)
+
+
+def filter_args() -> dict[str, list[str]]:
+    """The filter query arguments of the current request, for carrying into links."""
+    return {
+        key: [value for value in request.args.getlist(key) if value]
+        for key in ("from", "to", "category")
+        if any(request.args.getlist(key))
+    }
+
+
+def expense_page(
+    page_size: int, cursor: str | None, filters: ExpenseFilter
+) -> tuple[list[Expense], str | None]:
+    """
+    One page of the expense list: newest first, or ranked search matches when
+    the request has a `q` argument. A malformed cursor aborts with 400.
+    """
+    query = request.args.get("q", "").strip()
+    try:
+        if query:
+            return search_expenses(str(DATA_FILE), query, page_size, cursor, filters)
+        return page_expenses(str(DATA_FILE), page_size, cursor, filters)
+    except ValueError:
+        abort(400)
 
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    tracker = load_tracker()
     error = None
     message = None
 
@@ -96,8 +207,7 @@ def index():
                 amount=parsed_data["amount"],
                 description=parsed_data["description"],
             )
-            tracker.add_expense(expense)
-            save_expenses(str(DATA_FILE), tracker.expenses)
+            insert_expense(str(DATA_FILE), expense)
             return redirect(url_for("index", status="added"))
     else:
         form_defaults = {
@@ -117,33 +227,61 @@ def index():
             message = "Expense deleted."
         elif status == "missing":
             error = "Expense could not be found."
+        elif status == "archived":
+            error = ARCHIVED_ERROR
+        elif status == "imported":
+            message = (
+                f"Imported {request.args.get('accepted', 0)} expenses "
+                f"({request.args.get('duplicates', 0)} duplicates skipped, "
+                f"{request.args.get('rejected', 0)} rows rejected)."
+            )
+        elif status == "import-missing":
+            error = "Choose a CSV file to import."
+
+    filters = request_filters()
+    page_size = parse_page_size(request.args.get("limit"))
+    cursor = request.args.get("cursor") or None
+    expenses, next_cursor = expense_page(page_size, cursor, filters)
 
-    totals_by_cat = tracker.total_by_category()
-    highest, lowest = tracker.highest_and_lowest_category()
-    trend = [(d.isoformat(), amt) for d, amt in tracker.trend_by_date().items()]
-    monthly_totals = tracker.total_by_month()
-    expenses = sorted(tracker.expenses, key=lambda e: e.date, reverse=True)
+    points = parse_points(request.args.get("points"))
+    chart_points = points or CHART_POINTS
+    tracker = summary_tracker()
+    with phase("aggregate"):
+        total = tracker.total_expense(filters)
+        totals_by_cat = tracker.total_by_category(filters)
+        highest, lowest = tracker.highest_and_lowest_category(filters)
+        trend_period, trend = bucket_by_period(
+            tracker.trend_by_date(filters), points or TREND_TABLE_ROWS
+        )
+        monthly_totals = downsample_monthly(tracker.total_by_month(filters), chart_points)
 
-    return render_template(
+    return render(
         "index.html",
         form_data=form_defaults,
         error=error,
         message=message,
-        total=tracker.total_expense(),
+        total=total,
         totals_by_cat=totals_by_cat,
         trend=trend,
+        trend_period=trend_period,
         highest=highest,
         lowest=lowest,
         expenses=expenses,
+        page_size=page_size,
+        cursor=cursor,
+        next_cursor=next_cursor,
         categories=CATEGORIES,
         monthly_totals=monthly_totals,
+        chart_points=chart_points,
+        filters=filters,
+        filter_args=filter_args(),
+        query=request.args.get("q", "").strip(),
     )
 
 
 @app.route("/expense/<expense_id>/edit", methods=["GET", "POST"])
 def edit_expense(expense_id: str):
-    tracker = load_tracker()
-    expense = tracker.get_expense(expense_id)
+    expense = get_expense(str(DATA_FILE), expense_id)
     if not expense:
         abort(404)
 
@@ -151,15 +289,16 @@ def edit_expense(expense_id: str):
     if request.method == "POST":
         form_values, parsed_data, error = process_expense_form(request.form)
         if not error and parsed_data:
-            tracker.update_expense(
-                expense_id,
-                date=parsed_data["date"],
-                category=parsed_data["category"],
-                amount=parsed_data["amount"],
-                description=parsed_data["description"],
-            )
-            save_expenses(str(DATA_FILE), tracker.expenses)
-            return redirect(url_for("index", status="edited"))
+            expense.date = parsed_data["date"]
+            expense.category = parsed_data["category"]
+            expense.amount = parsed_data["amount"]
+            expense.description = parsed_data["description"]
+            if update_expense(str(DATA_FILE), expense):
+                return redirect(url_for("index", status="edited"))
+            # Only the live year can change; an archived expense is still found.
+            if not get_expense(str(DATA_FILE), expense_id):
+                return redirect(url_for("index", status="missing"))
+            error = ARCHIVED_ERROR
     else:
         form_values = {
             "category": expense.category,
@@ -168,7 +307,7 @@ def edit_expense(expense_id: str):
             "description": expense.description,
         }
 
-    return render_template(
+    return render(
         "edit.html",
         form_data=form_values,
         error=error,
@@ -179,12 +318,250 @@ def edit_expense(expense_id: str):
 
 @app.route("/expense/<expense_id>/delete", methods=["POST"])
 def delete_expense(expense_id: str):
-    tracker = load_tracker()
-    status = "deleted" if tracker.delete_expense(expense_id) else "missing"
-    if status == "deleted":
-        save_expenses(str(DATA_FILE), tracker.expenses)
+    if remove_expense(str(DATA_FILE), expense_id):
+        status = "deleted"
+    else:
+        # Only the live year can change; an archived expense is still found.
+        status = "archived" if get_expense(str(DATA_FILE), expense_id) else "missing"
     return redirect(url_for("index", status=status))
 
 
+@app.route("/import", methods=["POST"])
+def import_expenses():
+    # Imported on first use: only this route needs the importer.
+    try:
+        from importer import import_upload
+    except ModuleNotFoundError:
+        from .importer import import_upload
+
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        return redirect(url_for("index", status="import-missing"))
+    report = import_upload(str(DATA_FILE), upload.stream)
+    return redirect(
+        url_for(
+            "index",
+            status="imported",
+            accepted=report.accepted,
+            duplicates=report.duplicates,
+            rejected=report.rejected,
+        )
+    )
+
+
+def _batches(rows: Iterator[tuple]) -> Iterator[list[tuple]]:
+    while True:
+        batch = list(islice(rows, EXPORT_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _stream_csv(rows: Iterator[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "date", "category", "description", "amount"])
+    # Send the header straight away so the download starts before the first query batch.
+    yield buffer.getvalue()
+    for batch in _batches(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [expense_id, expense_date, category, description, format_cents(cents)]
+            for expense_id, expense_date, category, description, cents in batch
+        )
+        yield buffer.getvalue()
+
+
+def _stream_ndjson(rows: Iterator[tuple]) -> Iterator[str]:
+    for batch in _batches(rows):
+        yield "".join(
+            json.dumps(
+                {
+                    "id": expense_id,
+                    "date": expense_date,
+                    "category": category,
+                    "description": description,
+                    "amount": from_cents(cents),
+                }
+            )
+            + "\n"
+            for expense_id, expense_date, category, description, cents in batch
+        )
+
+
+@app.route("/export.csv")
+def export_csv():
+    rows = iter_expense_rows(str(DATA_FILE), request_filters(), EXPORT_BATCH_SIZE)
+    return Response(
+        _stream_csv(rows),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=expenses.csv"},
+    )
+
+
+@app.route("/export.ndjson")
+def export_ndjson():
+    rows = iter_expense_rows(str(DATA_FILE), request_filters(), EXPORT_BATCH_SIZE)
+    return Response(_stream_ndjson(rows), mimetype="application/x-ndjson")
+
+
+def _expense_json(expense: Expense) -> dict:
+    return {
+        "id": expense.id,
+        "date": expense.date.isoformat(),
+        "category": expense.category,
+        "description": expense.description,
+        "amount": expense.amount,
+    }
+
+
+def _category_json(entry: tuple[str, float] | None) -> dict | None:
+    return {"category": entry[0], "total": entry[1]} if entry else None
+
+
+def json_with_etag(build: Callable[[], object]) -> Response:
+    """
+    Answers with the JSON payload from `build`, tagged with the database's id
+    and data version. A request whose If-None-Match already holds the current
+    tag gets a 304 and `build` is never called.
+    """
+    path = str(DATA_FILE)
+    etag = f"{database_id(path):x}-v{data_version(path)}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        with phase("aggregate"):
+            payload = build()
+        with phase("render"):
+            response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/api/summary")
+def api_summary():
+    filters = request_filters()
+
+    def build():
+        tracker = summary_tracker()
+        highest, lowest = tracker.highest_and_lowest_category(filters)
+        return {
+            "total": tracker.total_expense(filters),
+            "highest": _category_json(highest),
+            "lowest": _category_json(lowest),
+        }
+
+    return json_with_etag(build)
+
+
+@app.route("/api/categories")
+def api_categories():
+    filters = request_filters()
+    return json_with_etag(lambda: {"totals": summary_tracker().total_by_category(filters)})
+
+
+@app.route("/api/trend/daily")
+def api_trend_daily():
+    filters = request_filters()
+
+    points = parse_points(request.args.get("points"))
+
+    def build():
+        trend = summary_tracker().trend_by_date(filters)
+        if points is not None:
+            trend = downsample_daily(trend, points)
+        return {"labels": [d.isoformat() for d in trend], "totals": list(trend.values())}
+
+    return json_with_etag(build)
+
+
+@app.route("/api/trend/monthly")
+def api_trend_monthly():
+    filters = request_filters()
+
+    points = parse_points(request.args.get("points"))
+
+    def build():
+        totals = summary_tracker().total_by_month(filters)
+        if points is not None:
+            totals = downsample_monthly(totals, points)
+        return {"labels": list(totals), "totals": list(totals.values())}
+
+    return json_with_etag(build)
+
+
+@app.route("/api/expenses")
+def api_expenses():
+    filters = request_filters()
+    page_size = parse_page_size(request.args.get("limit"))
+    cursor = request.args.get("cursor") or None
+
+    def build():
+        expenses, next_cursor = expense_page(page_size, cursor, filters)
+        return {"expenses": [_expense_json(e) for e in expenses], "next_cursor": next_cursor}
+
+    return json_with_etag(build)
+
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create or migrate the database and seed it from the CSV snapshot."""
+    count = init_database(str(DATA_FILE))
+    print(f"Database ready at {database_path(str(DATA_FILE))} ({count} expenses).")
+
+
+@app.cli.command("compile-templates")
+def compile_templates_command():
+    """Precompile the Jinja templates to Python modules for fast start."""
+    app.jinja_env.compile_templates(str(COMPILED_TEMPLATES_DIR), zip=None, ignore_errors=False)
+    print(f"Templates compiled to {COMPILED_TEMPLATES_DIR}.")
+
+
+def use_compiled_templates(directory: Path = COMPILED_TEMPLATES_DIR) -> bool:
+    """
+    Serves templates from the modules written by `compile-templates`, falling
+    back to the sources for any that are missing. Recompile after editing a
+    template, or the old version keeps being served.
+    """
+    if not directory.is_dir():
+        return False
+    app.jinja_env.loader = ChoiceLoader([ModuleLoader(str(directory)), app.jinja_env.loader])
+    return True
+
+
+def warm_up() -> None:
+    """Loads the templates and fills the summary cache for the unfiltered dashboard."""
+    for name in ("index.html", "edit.html"):
+        app.jinja_env.get_template(name)
+    tracker = summary_tracker()
+    tracker.total_expense()
+    tracker.total_by_category()
+    tracker.highest_and_lowest_category()
+    tracker.trend_by_date()
+    tracker.total_by_month()
+
+
+def start_warm_up() -> threading.Thread:
+    def run():
+        try:
+            warm_up()
+        except Exception:
+            logger.exception("Warm-up failed")
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+# Startup-optimised mode for hosts that spin down when idle: run
+# `flask init-db` and `flask compile-templates` at build time, then set
+# EXPENSE_TRACKER_FAST_START=1 so the first request finds everything ready.
+if os.environ.get("EXPENSE_TRACKER_FAST_START"):
+    use_compiled_templates()
+    start_warm_up()
+
+
 if __name__ == "__main__":
     app.run(debug=True)
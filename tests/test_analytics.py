@@ -0,0 +1,129 @@
+import statistics
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from benchmarks.synthetic import generate_expenses
+from src import analytics, columnar
+from src.columnar import ColumnarExpenseTracker
+from src.models import Expense, ExpenseFilter
+
+
+def naive_rolling(expenses, window):
+    """Average daily spend over the `window` days ending on each day, one day at a time."""
+    first = min(e.date for e in expenses)
+    last = max(e.date for e in expenses)
+    result = {}
+    day = first
+    while day <= last:
+        start = day - timedelta(days=window - 1)
+        total = sum(e.cents for e in expenses if start <= e.date <= day)
+        result[day] = total / (window * 100)
+        day += timedelta(days=1)
+    return result
+
+
+def naive_percentile(values, p):
+    ordered = sorted(values)
+    position = p * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def naive_months(expenses):
+    totals = {}
+    for e in expenses:
+        key = e.date.strftime("%Y-%m")
+        totals[key] = totals.get(key, 0) + e.cents
+    first, last = min(totals), max(totals)
+    year, month = int(first[:4]), int(first[5:])
+    result, previous = {}, None
+    while f"{year:04d}-{month:02d}" <= last:
+        key = f"{year:04d}-{month:02d}"
+        cents = totals.get(key, 0)
+        if previous is None:
+            result[key] = (cents / 100, None, None)
+        else:
+            result[key] = (cents / 100, (cents - previous) / 100, (cents - previous) / previous if previous else None)
+        previous = cents
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+
+def naive_outliers(expenses, fence):
+    flagged = []
+    for category in {e.category for e in expenses}:
+        amounts = [e.cents for e in expenses if e.category == category]
+        q1, q3 = naive_percentile(amounts, 0.25), naive_percentile(amounts, 0.75)
+        limit = q3 + fence * (q3 - q1)
+        flagged += [e.id for e in expenses if e.category == category and e.cents > limit]
+    return sorted(flagged)
+
+
+class AnalyticsTests(unittest.TestCase):
+    def setUp(self):
+        self.expenses = generate_expenses(1500, seed=3)
+
+    def assert_matches_naive(self, expenses, report):
+        for window in analytics.ROLLING_WINDOWS:
+            self.assertEqual(report.rolling[window], naive_rolling(expenses, window))
+        self.assertEqual(list(report.categories), sorted({e.category for e in expenses}))
+        for category, stats in report.categories.items():
+            amounts = [e.cents for e in expenses if e.category == category]
+            self.assertEqual(stats.count, len(amounts))
+            self.assertEqual(stats.median, naive_percentile(amounts, 0.5) / 100)
+            self.assertEqual(stats.p90, naive_percentile(amounts, 0.9) / 100)
+            self.assertAlmostEqual(stats.median, statistics.median(amounts) / 100)
+        months = {key: (m.total, m.delta, m.change) for key, m in report.months.items()}
+        self.assertEqual(months, naive_months(expenses))
+        self.assertEqual(
+            sorted(o.id for o in report.outliers), naive_outliers(expenses, analytics.OUTLIER_FENCE)
+        )
+        amounts = [o.amount for o in report.outliers]
+        self.assertEqual(amounts, sorted(amounts, reverse=True))
+
+    def check_all_paths(self):
+        tracker = ColumnarExpenseTracker(self.expenses)
+        self.assert_matches_naive(self.expenses, analytics.analyze(tracker))
+        filters = ExpenseFilter(start=date(2024, 3, 1), categories=frozenset({"Food", "Travel"}))
+        selected = [
+            e for e in self.expenses if e.date >= filters.start and e.category in filters.categories
+        ]
+        self.assert_matches_naive(selected, analytics.analyze(tracker, filters))
+
+    def test_matches_naive_implementations(self):
+        self.check_all_paths()
+
+    def test_matches_naive_implementations_without_numpy(self):
+        with mock.patch.object(columnar, "np", None):
+            self.check_all_paths()
+
+    def test_process_pool_gives_the_same_report(self):
+        tracker = ColumnarExpenseTracker(self.expenses)
+        self.assertEqual(analytics.analyze(tracker, processes=2), analytics.analyze(tracker))
+
+    def test_small_cases(self):
+        tracker = ColumnarExpenseTracker(
+            [
+                Expense(date(2025, 1, 31), "Food", 10.0, id="a"),
+                Expense(date(2025, 3, 1), "Food", 12.0, id="b"),
+                Expense(date(2025, 3, 1), "Food", 11.0, id="c"),
+                Expense(date(2025, 3, 2), "Food", 500.0, id="d"),
+            ]
+            + [Expense(date(2025, 3, 3), "Food", 10.0 + i, id=f"n{i}") for i in range(4)]
+        )
+        report = analytics.analyze(tracker)
+        self.assertEqual([o.id for o in report.outliers], ["d"])
+        self.assertEqual(report.categories["Food"].median, 11.5)
+        feb = report.months["2025-02"]
+        self.assertEqual((feb.total, feb.delta, feb.change), (0.0, -10.0, -1.0))
+        self.assertIsNone(report.months["2025-03"].change)
+        self.assertEqual(report.rolling[7][date(2025, 3, 1)], 23.0 / 7)
+
+        empty = analytics.analyze(ColumnarExpenseTracker())
+        self.assertEqual((empty.categories, empty.months, empty.outliers), ({}, {}, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
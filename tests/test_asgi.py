@@ -0,0 +1,197 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from datetime import date
+from pathlib import Path
+from urllib.parse import urlencode
+
+from src import asgi, storage, web_app
+from src.models import Expense
+
+
+def call(app, method, path, query="", body=b"", headers=()):
+    """Runs one HTTP request through the ASGI app; returns (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 5000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    return (
+        start["status"],
+        {name.decode(): value.decode() for name, value in start["headers"]},
+        b"".join(m.get("body", b"") for m in sent[1:]),
+    )
+
+
+class ASGITests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = Path(self.tmp.name) / "expenses.csv"
+        self.original_data_file = web_app.DATA_FILE
+        web_app.DATA_FILE = self.data_file
+        storage.save_expenses(
+            str(self.data_file),
+            [
+                Expense(date(2025, 11, 1), "Food", 10.0, "Lunch", id="a"),
+                Expense(date(2025, 11, 2), "Housing", 500.0, "Rent", id="b"),
+            ],
+        )
+        self.app = asgi.WSGIBridge(web_app.app, threads=2, backlog=0)
+
+    def tearDown(self):
+        web_app.DATA_FILE = self.original_data_file
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def test_dashboard_and_api(self):
+        status, headers, body = call(self.app, "GET", "/")
+        self.assertEqual(status, 200)
+        self.assertIn(b"510.00", body)
+
+        status, headers, body = call(self.app, "GET", "/api/expenses", "category=Food")
+        self.assertEqual(status, 200)
+        self.assertIn(b'"id":"a"', body.replace(b" ", b""))
+        status, _, _ = call(self.app, "GET", "/api/summary", headers=[("If-None-Match", headers["etag"])])
+        self.assertEqual(status, 304)
+
+    def test_form_post(self):
+        form = urlencode({"date": "2025-11-03", "category": "Food", "amount": "2.50", "description": "Tea"})
+        status, headers, _ = call(
+            self.app,
+            "POST",
+            "/",
+            body=form.encode(),
+            headers=[("Content-Type", "application/x-www-form-urlencoded"), ("Content-Length", str(len(form)))],
+        )
+        self.assertEqual(status, 302)
+        self.assertIn("status=added", headers["location"])
+        self.assertEqual(storage.total_amount(str(self.data_file)), 512.5)
+
+    def test_streamed_export_arrives_in_chunks(self):
+        storage.insert_expenses(
+            str(self.data_file),
+            [Expense(date(2025, 10, 1), "Other", 1.0, "x" * 200, id=f"e{i}") for i in range(1000)],
+        )
+        status, _, body = call(self.app, "GET", "/export.csv")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body.splitlines()), 1003)
+
+    def test_full_backlog_is_refused(self):
+        release = threading.Event()
+
+        def slow_app(environ, start_response):
+            release.wait(5)
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [b"done"]
+
+        app = asgi.WSGIBridge(slow_app, threads=1, backlog=0)
+
+        async def scenario():
+            busy = asyncio.get_running_loop().run_in_executor(
+                None, call, app, "GET", "/"
+            )
+            while app.in_flight == 0:
+                await asyncio.sleep(0.001)
+            refused = await asyncio.get_running_loop().run_in_executor(None, call, app, "GET", "/")
+            release.set()
+            return await busy, refused
+
+        served, refused = asyncio.run(scenario())
+        self.assertEqual(served[2], b"done")
+        self.assertEqual(refused[0], 503)
+
+    def test_headers_are_sent_with_the_first_chunk(self):
+        seen = []
+
+        def streaming_app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            yield b"first"
+            seen.append(started.wait(2))
+            yield b"rest"
+
+        started = threading.Event()
+        app = asgi.WSGIBridge(streaming_app, threads=1, backlog=0)
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.start":
+                started.set()
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        asyncio.run(app(scope, receive, send))
+        self.assertEqual(seen, [True])
+        self.assertEqual(b"".join(m.get("body", b"") for m in sent[1:]), b"firstrest")
+
+    def test_error_after_headers_ends_the_response(self):
+        def failing_app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            yield b"partial"
+            raise RuntimeError("boom")
+
+        app = asgi.WSGIBridge(failing_app, threads=1, backlog=0)
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        with self.assertLogs("src.asgi", "ERROR"):
+            asyncio.run(app({"type": "http", "method": "GET", "path": "/", "headers": []}, receive, send))
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(sent[-1], {"type": "http.response.body", "body": b"", "more_body": False})
+
+    def test_final_item_takes_no_stream_credit(self):
+        async def scenario():
+            channel = asgi._Channel(asyncio.get_running_loop(), window=2)
+            channel.finish(("end",))
+            self.assertEqual(await channel.get(), ("end",))
+            return channel
+
+        channel = asyncio.run(scenario())
+        self.assertTrue(channel._credits.acquire(blocking=False))
+        self.assertTrue(channel._credits.acquire(blocking=False))
+        self.assertFalse(channel._credits.acquire(blocking=False))
+
+    def test_environ_from_scope(self):
+        environ = asgi.build_environ(
+            {
+                "method": "GET",
+                "path": "/app/café",
+                "root_path": "/app",
+                "query_string": b"q=1",
+                "headers": [(b"accept", b"a"), (b"accept", b"b"), (b"content-type", b"text/plain")],
+            },
+            None,
+        )
+        self.assertEqual(environ["SCRIPT_NAME"], "/app")
+        self.assertEqual(environ["PATH_INFO"], "/café".encode().decode("latin-1"))
+        self.assertEqual(environ["HTTP_ACCEPT"], "a,b")
+        self.assertEqual(environ["CONTENT_TYPE"], "text/plain")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from src import storage
+from src.cache import CachedTracker
+from src.models import Expense, ExpenseFilter
+from src.tracker import SqlExpenseTracker
+
+
+class CachedTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+        storage.save_expenses(
+            self.path,
+            [
+                Expense(date(2025, 11, 1), "Food", 10.0, id="a"),
+                Expense(date(2025, 11, 2), "Housing", 500.0, id="b"),
+            ],
+        )
+        self.cache = CachedTracker(SqlExpenseTracker(self.path), self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def test_repeated_calls_hit_the_cache(self):
+        self.assertEqual(self.cache.total_expense(), 510.0)
+        self.assertEqual(self.cache.total_expense(), 510.0)
+        self.cache.total_by_month()
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_cache_size_is_bounded(self):
+        cache = CachedTracker(SqlExpenseTracker(self.path), self.path, max_entries=3)
+        cache.total_expense()
+        for day in range(1, 6):
+            cache.total_expense(ExpenseFilter(start=date(2025, 11, day)))
+            cache.total_expense()  # kept as the most recently used
+        self.assertEqual(cache.stats()["entries"], 3)
+        self.assertEqual(cache.hits, 5)
+        cache.close()
+
+    def test_close_unregisters_write_listener(self):
+        listeners = len(storage._write_listeners)
+        self.cache.close()
+        self.assertEqual(len(storage._write_listeners), listeners - 1)
+        self.cache.close()  # closing twice is harmless
+        self.assertEqual(len(storage._write_listeners), listeners - 1)
+
+    def test_row_level_write_invalidates(self):
+        self.cache.total_by_category()
+        storage.insert_expense(self.path, Expense(date(2025, 11, 3), "Food", 5.0, id="c"))
+        self.assertEqual(self.cache.total_by_category()["Food"], 15.0)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_write_from_another_process_is_detected(self):
+        self.cache.total_expense()
+        # Simulate another worker: write without going through this process's storage module.
+        conn = sqlite3.connect(storage.database_path(self.path))
+        with conn:
+            conn.execute("DELETE FROM expenses WHERE id = 'b'")
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+        conn.close()
+        self.assertEqual(self.cache.total_expense(), 10.0)
+        self.assertEqual(self.cache.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
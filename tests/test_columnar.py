@@ -0,0 +1,85 @@
+import unittest
+from datetime import date
+from unittest import mock
+
+from src import columnar
+from src.columnar import ColumnarExpenseTracker
+from src.models import Expense, ExpenseFilter
+from src.tracker import ExpenseTracker
+
+
+def sample_expenses():
+    return [
+        Expense(date(2025, 10, 30), "Food", 7.25, "Snack", id="a"),
+        Expense(date(2025, 11, 1), "Food", 10.0, id="b"),
+        Expense(date(2025, 11, 1), "Housing", 500.0, id="c"),
+        Expense(date(2025, 11, 2), "Food", 5.1, id="d"),
+        Expense(date(2025, 12, 24), "Travel", 120.99, id="e"),
+    ]
+
+
+class ColumnarExpenseTrackerTests(unittest.TestCase):
+    def assert_matches_reference(self, tracker, reference):
+        self.assertAlmostEqual(tracker.total_expense(), reference.total_expense())
+        self.assertEqual(tracker.total_by_category().keys(), reference.total_by_category().keys())
+        for category, total in reference.total_by_category().items():
+            self.assertAlmostEqual(tracker.total_by_category()[category], total)
+        self.assertEqual(list(tracker.trend_by_date()), list(reference.trend_by_date()))
+        self.assertEqual(list(tracker.total_by_month()), list(reference.total_by_month()))
+        for month, total in reference.total_by_month().items():
+            self.assertAlmostEqual(tracker.total_by_month()[month], total)
+        self.assertEqual(
+            tracker.highest_and_lowest_category()[0][0], reference.highest_and_lowest_category()[0][0]
+        )
+
+    def exercise(self):
+        tracker = ColumnarExpenseTracker(sample_expenses())
+        reference = ExpenseTracker(sample_expenses())
+        self.assert_matches_reference(tracker, reference)
+        filters = ExpenseFilter(start=date(2025, 11, 1), categories=frozenset({"Food", "Travel"}))
+        self.assertEqual(tracker.total_by_category(filters), reference.total_by_category(filters))
+        self.assertEqual(list(tracker.trend_by_date(filters)), list(reference.trend_by_date(filters)))
+        self.assertAlmostEqual(tracker.total_expense(filters), reference.total_expense(filters))
+
+        for t in (tracker, reference):
+            t.update_expense("b", date=date(2025, 12, 1), category="Health", amount=40.0, description="")
+            t.delete_expense("a")
+            t.add_expense(Expense(date(2025, 12, 2), "Food", 3.0, id="f"))
+        self.assert_matches_reference(tracker, reference)
+        self.assertEqual(tracker.get_expense("e").amount, 120.99)
+        self.assertIsNone(tracker.get_expense("a"))
+        self.assertEqual(sorted(e.id for e in tracker.expenses), ["b", "c", "d", "e", "f"])
+
+        snapshot = tracker.columns(ExpenseFilter(categories=frozenset({"Food"})))
+        self.assertEqual(sorted(snapshot.ids), ["d", "f"])
+        by_id = dict(zip(snapshot.ids, zip(snapshot.ordinals, snapshot.cents, snapshot.codes)))
+        ordinal, cents, code = by_id["d"]
+        self.assertEqual((date.fromordinal(int(ordinal)), int(cents)), (date(2025, 11, 2), 510))
+        self.assertEqual(snapshot.category_names[int(code)], "Food")
+        self.assertEqual(len(tracker.columns().ids), 5)
+
+    def test_matches_list_tracker(self):
+        self.exercise()
+
+    def test_matches_list_tracker_without_numpy(self):
+        with mock.patch.object(columnar, "np", None):
+            self.exercise()
+
+    def test_from_rows_matches_expenses(self):
+        rows = [
+            (e.id, e.date.isoformat(), e.category, e.description, e.cents)
+            for e in sample_expenses()
+        ]
+        tracker = ColumnarExpenseTracker.from_rows(rows)
+        self.assert_matches_reference(tracker, ExpenseTracker(sample_expenses()))
+        self.assertEqual(tracker.get_expense("a"), sample_expenses()[0])
+
+    def test_empty(self):
+        tracker = ColumnarExpenseTracker()
+        self.assertEqual(tracker.total_expense(), 0.0)
+        self.assertEqual(tracker.highest_and_lowest_category(), (None, None))
+        self.assertEqual(tracker.trend_by_date(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import math
+import unittest
+from datetime import date, timedelta
+
+from src.downsample import bucket_by_period, downsample_daily, downsample_monthly, lttb
+
+
+class LTTBTests(unittest.TestCase):
+    def test_short_series_are_kept(self):
+        self.assertEqual(lttb([0, 1, 2], [5, 6, 7], 10), [0, 1, 2])
+        self.assertEqual(lttb([0, 1, 2, 3], [5, 6, 7, 8], 2), [0, 1, 2, 3])
+
+    def test_keeps_ends_and_peaks(self):
+        xs = list(range(1000))
+        ys = [math.sin(x / 50) for x in xs]
+        ys[400] = 10.0  # a spike a naive stride would skip
+        keep = lttb(xs, ys, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertEqual(keep, sorted(set(keep)))
+        self.assertIn(400, keep)
+
+    def test_series_helpers(self):
+        start = date(2020, 1, 1)
+        trend = {start + timedelta(days=i): float(i % 7) for i in range(400)}
+        daily = downsample_daily(trend, 40)
+        self.assertEqual(len(daily), 40)
+        self.assertTrue(all(trend[d] == amount for d, amount in daily.items()))
+
+        months = {f"{2000 + i // 12}-{i % 12 + 1:02d}": float(i) for i in range(240)}
+        self.assertEqual(list(downsample_monthly(months, 12))[::11], ["2000-01", "2019-12"])
+
+
+class BucketTests(unittest.TestCase):
+    def test_switches_to_weeks_then_months(self):
+        start = date(2024, 1, 1)  # a Monday
+        trend = {start + timedelta(days=i): 1.1 for i in range(70)}
+        self.assertEqual(bucket_by_period(trend, 70)[0], "day")
+
+        period, rows = bucket_by_period(trend, 20)
+        self.assertEqual(period, "week")
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0], ("2024-01-01", 7.7))
+        self.assertEqual(rows[1][0], "2024-01-08")
+
+        period, rows = bucket_by_period(trend, 5)
+        self.assertEqual(period, "month")
+        self.assertEqual([label for label, _ in rows], ["2024-01", "2024-02", "2024-03"])
+        self.assertEqual(rows[0][1], 34.1)
+        self.assertAlmostEqual(sum(amount for _, amount in rows), 77.0)
+
+    def test_rows_stay_bounded_for_any_history(self):
+        trend = {date(1900, 1, 1) + timedelta(days=i): 1.0 for i in range(0, 125 * 365, 3)}
+        total = sum(trend.values())
+        expected = {7000: "week", 2000: "month", 600: "quarter", 130: "year", 10: "years", 3: "years"}
+        for rows, period in expected.items():
+            got, bucketed = bucket_by_period(trend, rows)
+            self.assertEqual(got, period)
+            self.assertLessEqual(len(bucketed), rows)
+            self.assertAlmostEqual(sum(amount for _, amount in bucketed), total)
+        self.assertEqual(bucket_by_period(trend, 10)[1][0][0], "1900–1912")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from src import storage, web_app
+from src.importer import import_csv, import_upload
+from src.models import Expense
+
+
+CSV_TEXT = """id,date,category,description,amount
+a,2025-11-01,Food,Lunch,12.50
+,2025-11-02,Travel,Taxi,30
+b,2025-11-03,Food,,-4
+c,2999-01-01,Food,Future,4
+d,2025-11-04,Gadgets,Unknown category,4
+existing,2025-11-05,Health,Already there,9
+a,2025-11-01,Food,Repeated in file,12.50
+"""
+
+
+class ImporterTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+        storage.save_expenses(self.path, [Expense(date(2025, 11, 5), "Health", 9.0, id="existing")])
+
+    def tearDown(self):
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def test_import_reports_accepted_duplicate_and_rejected_rows(self):
+        report = import_csv(self.path, io.StringIO(CSV_TEXT), batch_size=2)
+        self.assertEqual((report.accepted, report.duplicates, report.rejected), (2, 2, 3))
+        self.assertEqual([line for line, _ in report.errors], [4, 5, 6])
+        self.assertEqual(len(storage.load_expenses(self.path)), 3)
+        self.assertAlmostEqual(storage.get_expense(self.path, "a").amount, 12.5)
+
+    def test_unstorable_amounts_are_rejected(self):
+        rows = "date,category,amount\n" + "".join(
+            f"2025-11-01,Food,{amount}\n" for amount in ("inf", "nan", "1e20", "0.001", "abc", "0.01")
+        )
+        report = import_csv(self.path, io.StringIO(rows))
+        self.assertEqual((report.accepted, report.rejected), (1, 5))
+
+    def test_missing_date_is_rejected(self):
+        report = import_csv(self.path, io.StringIO("date,category,amount\n,Food,4\n2025-11-01,Food,4\n"))
+        self.assertEqual((report.accepted, report.rejected), (1, 1))
+        self.assertEqual(report.errors, [(2, "Date is required.")])
+
+    def test_non_utf8_upload_is_reported(self):
+        data = "date,category,amount\n2025-11-01,Food,4\n".encode() + b"2025-11-02,Food,\xff\xfe\n"
+        report = import_upload(self.path, io.BytesIO(data))
+        self.assertEqual((report.accepted, report.rejected), (0, 1))
+        self.assertIn("not UTF-8", report.errors[0][1])
+
+    def test_reimport_is_idempotent(self):
+        import_csv(self.path, io.StringIO(CSV_TEXT))
+        report = import_csv(self.path, io.StringIO(CSV_TEXT))
+        # The row without an id gets a fresh one each time, so only it is re-added.
+        self.assertEqual((report.accepted, report.duplicates), (1, 3))
+
+    def test_upload_route(self):
+        original = web_app.DATA_FILE
+        web_app.DATA_FILE = Path(self.path)
+        try:
+            response = web_app.app.test_client().post(
+                "/import",
+                data={"file": (io.BytesIO(CSV_TEXT.encode()), "bank.csv")},
+                content_type="multipart/form-data",
+            )
+        finally:
+            web_app.DATA_FILE = original
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("accepted=2", response.headers["Location"])
+        self.assertIn("rejected=3", response.headers["Location"])
+
+    def test_upload_route_reports_non_utf8_file(self):
+        original = web_app.DATA_FILE
+        web_app.DATA_FILE = Path(self.path)
+        try:
+            response = web_app.app.test_client().post(
+                "/import",
+                data={"file": (io.BytesIO(b"\xff\xfedate,category,amount\n"), "bank.csv")},
+                content_type="multipart/form-data",
+            )
+        finally:
+            web_app.DATA_FILE = original
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("rejected=1", response.headers["Location"])
+
+
+if __name__ == "__main__":
+    unittest.main()
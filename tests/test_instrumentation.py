@@ -0,0 +1,85 @@
+import tempfile
+import time
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from src import instrumentation, storage, web_app
+from src.models import Expense
+
+
+class RequestTimingsTests(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.end_request()
+
+    def test_nested_phases_are_exclusive(self):
+        timings = instrumentation.start_request()
+        with instrumentation.phase("save"):
+            time.sleep(0.01)
+            with instrumentation.phase("connect"):
+                time.sleep(0.02)
+        self.assertGreaterEqual(timings.phases["connect"], 0.02)
+        self.assertLess(timings.phases["save"], 0.02)
+        self.assertIn("connect;dur=", timings.server_timing(0.05))
+
+    def test_phases_outside_a_request_are_ignored(self):
+        with instrumentation.phase("query"):
+            pass
+        self.assertIsNone(instrumentation._current.get())
+
+
+class FlaskInstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = Path(self.tmp.name) / "expenses.csv"
+        self.original_data_file = web_app.DATA_FILE
+        web_app.DATA_FILE = self.data_file
+        storage.save_expenses(
+            str(self.data_file), [Expense(date(2025, 11, 1), "Food", 10.0, "Lunch", id="a")]
+        )
+        config = {
+            "INSTRUMENTATION": True,
+            "PROFILE_SAMPLE_RATE": 0,
+            "PROFILE_DIR": str(Path(self.tmp.name) / "profiles"),
+            "PROFILE_KEEP": 1,
+        }
+        self.config = mock.patch.dict(web_app.app.config, config)
+        self.config.start()
+        self.client = web_app.app.test_client()
+
+    def tearDown(self):
+        self.config.stop()
+        web_app.DATA_FILE = self.original_data_file
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def test_server_timing_header(self):
+        header = self.client.get("/").headers["Server-Timing"]
+        for name in ("connect", "query", "convert", "aggregate", "render", "total"):
+            self.assertIn(f"{name};dur=", header)
+
+    def test_metrics_endpoint(self):
+        self.client.get("/")
+        self.client.get("/api/summary")
+        body = self.client.get("/metrics").get_data(as_text=True)
+        self.assertIn('expense_tracker_requests_total{endpoint="index",method="GET",status="200"}', body)
+        self.assertIn('expense_tracker_request_duration_seconds_bucket{endpoint="api_summary",le="+Inf"} 1', body)
+        self.assertIn('phase="render"', body)
+        self.assertIn("expense_tracker_cache_misses_total", body)
+
+    def test_disabled_by_default(self):
+        web_app.app.config["INSTRUMENTATION"] = False
+        self.assertNotIn("Server-Timing", self.client.get("/").headers)
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    def test_slowest_profiles_are_kept(self):
+        web_app.app.config["PROFILE_SAMPLE_RATE"] = 1.0
+        for _ in range(3):
+            self.client.get("/")
+        dumps = list((Path(self.tmp.name) / "profiles").glob("*.prof"))
+        self.assertEqual(len(dumps), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
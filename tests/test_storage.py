@@ -0,0 +1,541 @@
+import csv
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from pathlib import Path
+
+from src import storage
+from src.models import Expense, ExpenseFilter, parse_iso_date
+
+
+class StorageTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+        self.expenses = [
+            Expense(date(2025, 11, 1), "Food", 10.0, id="a"),
+            Expense(date(2025, 11, 1), "Housing", 500.0, id="b"),
+            Expense(date(2025, 11, 2), "Food", 5.0, id="c"),
+        ]
+        storage.save_expenses(self.path, self.expenses)
+
+    def tearDown(self):
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def read_csv_ids(self):
+        storage.flush_csv_exports()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return sorted(row["id"] for row in csv.DictReader(f))
+
+    def test_insert_expense(self):
+        storage.insert_expense(self.path, Expense(date(2025, 11, 3), "Travel", 42.5, id="d"))
+        loaded = {e.id: e for e in storage.load_expenses(self.path)}
+        self.assertEqual(len(loaded), 4)
+        self.assertAlmostEqual(loaded["d"].amount, 42.5)
+        self.assertEqual(self.read_csv_ids(), ["a", "b", "c", "d"])
+
+    def test_update_expense(self):
+        expense = storage.get_expense(self.path, "a")
+        expense.amount = 12.0
+        expense.category = "Other"
+        self.assertTrue(storage.update_expense(self.path, expense))
+        updated = storage.get_expense(self.path, "a")
+        self.assertEqual(updated.category, "Other")
+        self.assertAlmostEqual(updated.amount, 12.0)
+
+    def test_update_missing_expense(self):
+        missing = Expense(date(2025, 11, 3), "Food", 1.0, id="missing")
+        self.assertFalse(storage.update_expense(self.path, missing))
+
+    def test_remove_expense(self):
+        self.assertTrue(storage.remove_expense(self.path, "b"))
+        self.assertFalse(storage.remove_expense(self.path, "b"))
+        self.assertIsNone(storage.get_expense(self.path, "b"))
+        self.assertEqual(self.read_csv_ids(), ["a", "c"])
+
+    def test_batch_operations(self):
+        new = [
+            Expense(date(2025, 12, 1), "Health", 30.0, id="d"),
+            Expense(date(2025, 12, 2), "Health", 20.0, id="e"),
+        ]
+        self.assertEqual(storage.insert_expenses(self.path, new), 2)
+        for e in new:
+            e.amount *= 2
+        self.assertEqual(storage.update_expenses(self.path, new), 2)
+        self.assertAlmostEqual(storage.get_expense(self.path, "e").amount, 40.0)
+        self.assertEqual(storage.remove_expenses(self.path, ["a", "d", "missing"]), 2)
+        self.assertEqual(len(storage.load_expenses(self.path)), 3)
+
+    def test_page_expenses_walks_all_rows_in_order(self):
+        storage.insert_expenses(
+            self.path,
+            [Expense(date(2025, 11, 2), "Travel", 1.0, id=f"t{i}") for i in range(4)],
+        )
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = storage.page_expenses(self.path, 2, cursor)
+            self.assertLessEqual(len(page), 2)
+            seen.extend((e.date, e.id) for e in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(seen), 7)
+
+    def test_page_expenses_rejects_bad_cursor(self):
+        with self.assertRaises(ValueError):
+            storage.page_expenses(self.path, 2, "not-a-cursor")
+
+    def test_csv_export_is_debounced(self):
+        storage.flush_csv_exports()
+        csv_file = Path(self.path)
+        before = csv_file.stat().st_mtime_ns
+        for i in range(5):
+            storage.insert_expense(self.path, Expense(date(2025, 12, 1), "Food", 1.0, id=f"x{i}"))
+        # Writes return before the snapshot is rewritten ...
+        self.assertEqual(csv_file.stat().st_mtime_ns, before)
+        # ... and the whole burst lands in a single export.
+        self.assertEqual(len(self.read_csv_ids()), 8)
+        self.assertEqual(list(csv_file.parent.glob("*.tmp")), [])
+
+    def test_flush_waits_for_an_export_the_thread_has_taken(self):
+        exporter = storage.CsvExporter(delay=0)
+        taken, done = threading.Event(), []
+
+        def slow_export(csv_path):
+            taken.set()
+            time.sleep(0.2)  # the gap before the export takes its lock
+            done.append(csv_path)
+
+        exporter._export = slow_export
+        exporter.schedule(Path(self.path))
+        taken.wait(5)
+        exporter.flush()
+        self.assertEqual(done, [Path(self.path)])
+
+    def test_database_id_is_kept_per_database(self):
+        database_id = storage.database_id(self.path)
+        self.assertNotEqual(database_id, 0)
+        storage.insert_expense(self.path, Expense(date(2025, 11, 3), "Travel", 42.5, id="d"))
+        storage.close_connections()
+        self.assertEqual(storage.database_id(self.path), database_id)
+        other = str(Path(self.tmp.name) / "other.csv")
+        storage.save_expenses(other, self.expenses)
+        self.assertNotEqual(storage.database_id(other), database_id)
+
+    def test_parse_iso_date(self):
+        self.assertEqual(parse_iso_date("2025-11-01"), date(2025, 11, 1))
+        self.assertEqual(parse_iso_date("2025-1-5"), date(2025, 1, 5))
+        for bad in ("2025-13-01", "20251101", "2025-W01-1", ""):
+            with self.assertRaises(ValueError):
+                parse_iso_date(bad)
+
+    def test_amounts_are_exact_cents(self):
+        storage.insert_expenses(
+            self.path,
+            [Expense(date(2025, 12, 1), "Food", 0.1, id=f"p{i}") for i in range(10)]
+            + [Expense(date(2025, 12, 1), "Food", 0.285, id="half")],
+        )
+        self.assertEqual(storage.get_expense(self.path, "half").amount, 0.29)
+        self.assertEqual(storage.total_amount(self.path), 516.29)
+        self.assertEqual(storage.totals_by_date(self.path)[date(2025, 12, 1)], 1.29)
+
+    def test_csv_round_trip_is_lossless(self):
+        storage.insert_expense(self.path, Expense(date(2025, 12, 1), "Food", 19.99, id="d"))
+        storage.flush_csv_exports()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            amounts = {row["id"]: row["amount"] for row in csv.DictReader(f)}
+        self.assertEqual(amounts["d"], "19.99")
+        loaded = storage._load_from_csv(Path(self.path))
+        self.assertEqual(sorted(e.cents for e in loaded), [500, 1000, 1999, 50000])
+
+    def create_real_amount_database(self, amounts):
+        storage.close_connections()
+        db_path = Path(self.path).with_suffix(".db")
+        db_path.unlink()
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE expenses (id TEXT PRIMARY KEY, date TEXT NOT NULL, "
+            "category TEXT NOT NULL, description TEXT NOT NULL DEFAULT '', amount REAL NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO expenses VALUES (?, ?, ?, '', ?)",
+            [(expense_id, "2025-11-01", "Food", amount) for expense_id, amount in amounts],
+        )
+        conn.commit()
+        conn.close()
+        return db_path
+
+    def test_real_amount_database_is_migrated(self):
+        self.create_real_amount_database([("a", 0.1), ("b", 0.2)])
+
+        self.assertEqual(storage.get_expense(self.path, "b").amount, 0.2)
+        self.assertEqual(storage.total_amount(self.path), 0.3)
+        self.assertEqual(storage.verify_rollups(self.path), [])
+        conn = storage._connect(self.path)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], storage.SCHEMA_VERSION)
+
+    def test_failed_migration_leaves_the_database_untouched(self):
+        db_path = self.create_real_amount_database([("a", 0.1), ("b", "abc")])
+        with self.assertRaises(ValueError):
+            storage.total_amount(self.path)
+        storage.close_connections()
+
+        conn = sqlite3.connect(db_path)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.assertEqual(tables, {"expenses"})
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM expenses WHERE amount IS NOT NULL").fetchone()[0], 2)
+            conn.execute("UPDATE expenses SET amount = 0.2 WHERE id = 'b'")
+            conn.commit()
+        finally:
+            conn.close()
+        self.assertEqual(storage.total_amount(self.path), 0.3)
+
+    def test_init_database_stamps_schema_version(self):
+        storage.close_connections()
+        Path(self.path).with_suffix(".db").unlink()
+        self.assertEqual(storage.init_database(self.path), 3)
+        conn = sqlite3.connect(storage.database_path(self.path))
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(version, storage.SCHEMA_VERSION)
+        self.assertEqual(storage.total_amount(self.path), 515.0)
+
+    def test_empty_database_is_seeded_from_csv(self):
+        storage.close_connections()
+        Path(self.path).with_suffix(".db").unlink()
+        self.assertEqual({e.id for e in storage.load_expenses(self.path)}, {"a", "b", "c"})
+
+    def test_seeding_skips_rows_with_bad_amounts(self):
+        storage.close_connections()
+        Path(self.path).with_suffix(".db").unlink()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("x,2025-11-04,Food,,abc\ny,2025-11-04,Food,,inf\nz,2025-11-04,Food,,1e30\n")
+        self.assertEqual({e.id for e in storage.load_expenses(self.path)}, {"a", "b", "c"})
+
+
+class RollupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+        storage.save_expenses(
+            self.path,
+            [
+                Expense(date(2025, 10, 31), "Food", 10.0, id="a"),
+                Expense(date(2025, 11, 1), "Food", 2.5, id="b"),
+                Expense(date(2025, 11, 1), "Housing", 500.0, id="c"),
+            ],
+        )
+
+    def tearDown(self):
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def rollup_rows(self, table):
+        return storage._connect(self.path).execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+
+    def test_triggers_follow_row_level_writes(self):
+        storage.insert_expense(self.path, Expense(date(2025, 11, 1), "Food", 1.5, id="d"))
+        moved = storage.get_expense(self.path, "a")
+        moved.date = date(2025, 11, 2)
+        storage.update_expense(self.path, moved)
+        storage.remove_expense(self.path, "c")
+
+        self.assertEqual(storage.verify_rollups(self.path), [])
+        self.assertEqual(
+            [tuple(row) for row in self.rollup_rows("monthly_totals")], [("2025-11", "Food", 1400, 3)]
+        )
+        self.assertEqual(storage.totals_by_date(self.path), {date(2025, 11, 1): 4.0, date(2025, 11, 2): 10.0})
+
+    def test_verify_and_rebuild(self):
+        with storage._connect(self.path) as conn:
+            conn.execute("UPDATE daily_totals SET total_cents = 0 WHERE category = 'Housing'")
+        self.assertEqual(len(storage.verify_rollups(self.path)), 1)
+        storage.rebuild_rollups(self.path)
+        self.assertEqual(storage.verify_rollups(self.path), [])
+
+    def test_existing_database_is_backfilled(self):
+        with storage._connect(self.path) as conn:
+            conn.executescript(
+                "DROP TABLE daily_totals; DROP TABLE monthly_totals;"
+                "DROP TRIGGER expenses_rollup_insert; DROP TRIGGER expenses_rollup_delete;"
+                "DROP TRIGGER expenses_rollup_update; PRAGMA user_version = 0;"
+            )
+        storage.close_connections()
+        self.assertEqual(storage.totals_by_month(self.path), {"2025-10": 10.0, "2025-11": 502.5})
+        self.assertEqual(storage.verify_rollups(self.path), [])
+
+
+class SearchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+        storage.save_expenses(
+            self.path,
+            [
+                Expense(date(2025, 11, 1), "Food", 10.0, "Weekly groceries", id="a"),
+                Expense(date(2025, 11, 2), "Food", 4.0, "Groceries, groceries again", id="b"),
+                Expense(date(2025, 11, 3), "Housing", 500.0, "Rent", id="c"),
+                Expense(date(2025, 11, 4), "Transportation", 2.5, "Bus to the grocer", id="d"),
+            ],
+        )
+
+    def tearDown(self):
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def ids(self, query, **kwargs):
+        return [e.id for e in storage.search_expenses(self.path, query, 10, **kwargs)[0]]
+
+    def test_matches_are_ranked_prefixes(self):
+        self.assertEqual(self.ids("grocer"), ["b", "a", "d"])
+        self.assertEqual(self.ids("housing"), ["c"])
+        self.assertEqual(self.ids("weekly groc"), ["a"])
+        self.assertEqual(self.ids('"groc* OR ('), [])
+        self.assertEqual(self.ids("  "), [])
+
+    def test_filters_and_pagination(self):
+        filters = ExpenseFilter(categories=frozenset({"Food"}))
+        self.assertEqual(self.ids("grocer", filters=filters), ["b", "a"])
+        first, cursor = storage.search_expenses(self.path, "grocer", 2)
+        rest, last = storage.search_expenses(self.path, "grocer", 2, cursor)
+        self.assertEqual([e.id for e in first + rest], ["b", "a", "d"])
+        self.assertIsNone(last)
+        with self.assertRaises(ValueError):
+            storage.search_expenses(self.path, "grocer", 2, "2025-11-01:a")
+
+    def test_index_follows_writes(self):
+        storage.insert_expense(self.path, Expense(date(2025, 11, 5), "Other", 1.0, "Cinema", id="e"))
+        updated = storage.get_expense(self.path, "c")
+        updated.description = "Rent and cinema snacks"
+        storage.update_expense(self.path, updated)
+        storage.remove_expense(self.path, "e")
+        self.assertEqual(self.ids("cinema"), ["c"])
+        self.assertEqual(self.ids("rent"), ["c"])
+        self.assertTrue(storage.check_search_index(self.path))
+
+    def test_existing_database_is_backfilled_and_rebuilt(self):
+        with storage._connect(self.path) as conn:
+            conn.executescript(
+                "DROP TRIGGER expenses_fts_insert; DROP TRIGGER expenses_fts_delete;"
+                "DROP TRIGGER expenses_fts_update; DROP TABLE expenses_fts; PRAGMA user_version = 1;"
+            )
+        storage.close_connections()
+        self.assertEqual(self.ids("rent"), ["c"])
+
+        with storage._connect(self.path) as conn:
+            conn.execute("DROP TRIGGER expenses_fts_update")
+            conn.execute("UPDATE expenses SET description = 'Mortgage' WHERE id = 'c'")
+        self.assertFalse(storage.check_search_index(self.path))
+        storage.rebuild_search_index(self.path)
+        self.assertTrue(storage.check_search_index(self.path))
+        self.assertEqual(self.ids("mortgage"), ["c"])
+
+
+class PartitionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+        self.expenses = [
+            Expense(date(2022, 3, 1), "Food", 1.25, "Old lunch", id="a"),
+            Expense(date(2023, 6, 1), "Food", 10.0, "Lunch", id="b"),
+            Expense(date(2023, 12, 31), "Housing", 500.0, "Rent", id="c"),
+            Expense(date(2024, 1, 1), "Food", 2.5, "Coffee", id="d"),
+        ]
+        storage.save_expenses(self.path, self.expenses)
+
+    def tearDown(self):
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def snapshot(self):
+        filters = ExpenseFilter(start=date(2023, 6, 1), end=date(2024, 12, 31))
+        return (
+            [e.id for e in storage.load_expenses(self.path)],
+            [row[0] for row in storage.iter_expense_rows(self.path)],
+            [row[0] for row in storage.iter_expense_rows(self.path, filters)],
+            storage.total_amount(self.path),
+            storage.total_amount(self.path, filters),
+            storage.totals_by_category(self.path),
+            storage.totals_by_date(self.path, filters),
+            storage.totals_by_month(self.path),
+            [e.id for e in storage.search_expenses(self.path, "lunch", 10)[0]],
+        )
+
+    def test_archived_years_are_read_transparently(self):
+        before = self.snapshot()
+        self.assertEqual(storage.archive_year(self.path, 2023), 2)
+        self.assertEqual(storage.archive_year(self.path, 2022), 1)
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(storage.list_archives(self.path), [(2022, 1, 125), (2023, 2, 51000)])
+        self.assertEqual(storage.get_expense(self.path, "c").amount, 500.0)
+
+        live = sqlite3.connect(storage.database_path(self.path))
+        try:
+            self.assertEqual(live.execute("SELECT id FROM expenses").fetchall(), [("d",)])
+        finally:
+            live.close()
+        storage.flush_csv_exports()
+        with storage.archive_path(self.path, 2023).with_suffix(".csv").open(newline="") as f:
+            self.assertEqual([row["id"] for row in csv.DictReader(f)], ["c", "b"])
+
+    def test_pages_merge_partitions(self):
+        storage.archive_year(self.path, 2023)
+        storage.insert_expense(self.path, Expense(date(2023, 7, 1), "Food", 3.0, "Late lunch", id="e"))
+        ids, cursor = [], None
+        while True:
+            page, cursor = storage.page_expenses(self.path, 2, cursor)
+            ids += [e.id for e in page]
+            if cursor is None:
+                break
+        self.assertEqual(ids, ["d", "c", "e", "b", "a"])
+        first, cursor = storage.search_expenses(self.path, "lunch", 2)
+        rest, _ = storage.search_expenses(self.path, "lunch", 2, cursor)
+        self.assertEqual(sorted(e.id for e in first + rest), ["a", "b", "e"])
+
+        self.assertEqual(storage.archive_year(self.path, 2023), 1)
+        self.assertEqual(storage.list_archives(self.path), [(2023, 3, 51300)])
+
+    def test_archives_are_read_only(self):
+        storage.archive_year(self.path, 2023)
+        moved = storage.get_expense(self.path, "b")
+        moved.amount = 99.0
+        self.assertFalse(storage.update_expense(self.path, moved))
+        self.assertFalse(storage.remove_expense(self.path, "b"))
+        self.assertEqual(storage.insert_new_expenses(self.path, self.expenses), 0)
+        storage.save_expenses(self.path, self.expenses)
+        self.assertEqual(len(storage.load_expenses(self.path)), 4)
+        self.assertEqual(storage.get_expense(self.path, "b").amount, 10.0)
+
+    def test_only_overlapping_archives_are_opened(self):
+        storage.archive_year(self.path, 2022)
+        storage.archive_year(self.path, 2023)
+        filters = ExpenseFilter(start=date(2023, 1, 1))
+        self.assertEqual(len(storage._partitions(self.path, filters)), 2)
+        self.assertEqual(len(storage._partitions(self.path, ExpenseFilter(start=date(2024, 1, 1)))), 1)
+
+    def test_open_year_cannot_be_archived(self):
+        with self.assertRaises(ValueError):
+            storage.archive_year(self.path, date.today().year)
+
+
+class WriteQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+        storage.save_expenses(self.path, [Expense(date(2025, 11, 1), "Food", 1.0, id="a")])
+        self.queue = storage.enable_write_queue(window=0.05, max_batch=100)
+
+    def tearDown(self):
+        storage.disable_write_queue()
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def run_threads(self, targets):
+        threads = [threading.Thread(target=target) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+    def test_concurrent_writes_share_commits(self):
+        def insert(i):
+            return lambda: storage.insert_expense(
+                self.path, Expense(date(2025, 11, 2), "Food", 0.5, id=f"t{i}")
+            )
+
+        self.run_threads([insert(i) for i in range(20)])
+        self.assertEqual(len(storage.load_expenses(self.path)), 21)
+        self.assertLess(self.queue.batches, 20)
+        self.assertEqual(storage.total_amount(self.path), 11.0)
+        self.assertEqual(storage.verify_rollups(self.path), [])
+
+    def test_failed_write_does_not_affect_its_batch(self):
+        errors = []
+
+        def duplicate():
+            try:
+                storage.insert_expense(self.path, Expense(date(2025, 11, 2), "Food", 9.0, id="a"))
+            except sqlite3.IntegrityError as exc:
+                errors.append(exc)
+
+        def insert():
+            storage.insert_expense(self.path, Expense(date(2025, 11, 2), "Travel", 2.0, id="b"))
+
+        self.run_threads([insert, duplicate])
+        self.assertEqual(len(errors), 1)
+        self.assertEqual({e.id for e in storage.load_expenses(self.path)}, {"a", "b"})
+        self.assertEqual(storage.totals_by_category(self.path), {"Food": 1.0, "Travel": 2.0})
+
+    def test_write_is_committed_when_it_returns(self):
+        version = storage.data_version(self.path)
+        storage.insert_expense(self.path, Expense(date(2025, 11, 2), "Food", 2.0, id="b"))
+        other = sqlite3.connect(storage.database_path(self.path))
+        try:
+            self.assertEqual(other.execute("SELECT COUNT(*) FROM expenses").fetchone()[0], 2)
+        finally:
+            other.close()
+        self.assertEqual(storage.data_version(self.path), version + 1)
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "expenses.csv")
+
+    def tearDown(self):
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def test_connection_is_reused_per_thread(self):
+        conn = storage._connect(self.path)
+        self.assertIs(storage._connect(self.path), conn)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(storage._connect(self.path)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], conn)
+
+    def test_connections_close_when_their_thread_ends(self):
+        storage.insert_expense(self.path, Expense(date(2025, 11, 1), "Food", 10.0, id="a"))
+        before = len(storage._pool.open_connections())
+        opened = []
+
+        def query():
+            storage.total_amount(self.path)
+            opened.append(storage._connect(self.path))
+
+        for _ in range(50):
+            thread = threading.Thread(target=query)
+            thread.start()
+            thread.join()
+        self.assertEqual(len(storage._pool.open_connections()), before)
+        for conn in opened:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+    def test_reader_is_not_blocked_by_open_write_transaction(self):
+        storage.insert_expense(self.path, Expense(date(2025, 11, 1), "Food", 10.0, id="a"))
+        writer = storage._connect(self.path)
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM expenses")
+
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(storage.total_amount(self.path)))
+        thread.start()
+        thread.join(timeout=5)
+        writer.rollback()
+        self.assertEqual(seen, [10.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
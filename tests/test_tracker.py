@@ -1,8 +1,11 @@
+import tempfile
 import unittest
 from datetime import date
+from pathlib import Path
 
-from src.models import Expense
-from src.tracker import ExpenseTracker
+from src import storage
+from src.models import Expense, ExpenseFilter
+from src.tracker import ExpenseTracker, SqlExpenseTracker
 
 
 class ExpenseTrackerTests(unittest.TestCase):
@@ -18,6 +21,18 @@ class ExpenseTrackerTests(unittest.TestCase):
     def test_total_expense(self):
         self.assertAlmostEqual(self.tracker.total_expense(), 515.0)
 
+    def test_later_duplicate_id_replaces_earlier(self):
+        tracker = ExpenseTracker(
+            [
+                Expense(date(2025, 11, 3), "Food", 1.0, id="x"),
+                Expense(date(2025, 11, 1), "Rent", 2.0, id="y"),
+                Expense(date(2025, 11, 2), "Food", 4.0, id="x"),
+            ]
+        )
+        self.assertEqual([e.id for e in tracker.iter_by_date()], ["y", "x"])
+        self.assertAlmostEqual(tracker.total_expense(), 6.0)
+        self.assertTrue(tracker.check_consistency())
+
     def test_total_by_category(self):
         totals = self.tracker.total_by_category()
         self.assertAlmostEqual(totals["Food"], 15.0)
@@ -39,6 +54,105 @@ class ExpenseTrackerTests(unittest.TestCase):
         self.assertIn("2025-11", totals)
         self.assertAlmostEqual(totals["2025-11"], 515.0)
 
+    def test_running_totals_follow_mutations(self):
+        extra = Expense(date(2025, 12, 5), "Travel", 80.0)
+        self.tracker.add_expense(extra)
+        self.assertAlmostEqual(self.tracker.total_by_month()["2025-12"], 80.0)
+
+        rent_id = self.tracker.expenses[1].id
+        self.tracker.update_expense(
+            rent_id, date=date(2025, 12, 1), category="Housing", amount=450.0, description=""
+        )
+        self.assertNotIn("Rent", self.tracker.total_by_category())
+        self.assertAlmostEqual(self.tracker.total_by_month()["2025-12"], 530.0)
+
+        self.tracker.delete_expense(extra.id)
+        self.assertNotIn(date(2025, 12, 5), self.tracker.trend_by_date())
+        self.assertAlmostEqual(self.tracker.total_expense(), 465.0)
+        self.assertEqual(self.tracker.highest_and_lowest_category()[1], ("Food", 15.0))
+        self.assertTrue(self.tracker.check_consistency())
+
+    def test_lookup_and_date_order(self):
+        food = self.tracker.expenses[2]
+        self.assertIs(self.tracker.get_expense(food.id), food)
+        self.tracker.update_expense(
+            food.id, date=date(2025, 10, 31), category="Food", amount=5.0, description=""
+        )
+        self.assertEqual(
+            [e.date for e in self.tracker.iter_by_date()],
+            [date(2025, 10, 31), date(2025, 11, 1), date(2025, 11, 1)],
+        )
+        self.assertTrue(self.tracker.delete_expense(food.id))
+        self.assertFalse(self.tracker.delete_expense(food.id))
+        self.assertIsNone(self.tracker.get_expense(food.id))
+        self.assertEqual(len(list(self.tracker.iter_by_date(reverse=True))), 2)
+
+    def test_filtered_aggregates(self):
+        november_first = ExpenseFilter(end=date(2025, 11, 1))
+        self.assertAlmostEqual(self.tracker.total_expense(november_first), 510.0)
+        food = ExpenseFilter(start=date(2025, 11, 2), categories=frozenset({"Food"}))
+        self.assertEqual(self.tracker.total_by_category(food), {"Food": 5.0})
+        self.assertEqual(list(self.tracker.trend_by_date(food)), [date(2025, 11, 2)])
+        self.assertEqual(self.tracker.total_by_month(ExpenseFilter(start=date(2025, 12, 1))), {})
+
+    def test_totals_do_not_drift(self):
+        tracker = ExpenseTracker()
+        for i in range(1000):
+            tracker.add_expense(Expense(date(2025, 11, 1), "Food", 0.1, id=str(i)))
+        for i in range(999):
+            tracker.delete_expense(str(i))
+        self.assertEqual(tracker.total_expense(), 0.1)
+        self.assertEqual(tracker.total_by_category(), {"Food": 0.1})
+        self.assertTrue(tracker.check_consistency())
+
+    def test_check_consistency_detects_bypassed_mutation(self):
+        self.tracker.expenses[0].amount = 99.0
+        self.assertFalse(self.tracker.check_consistency())
+
+
+class SqlExpenseTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = str(Path(self.tmp.name) / "expenses.csv")
+        expenses = [
+            Expense(date(2025, 10, 30), "Food", 7.25),
+            Expense(date(2025, 11, 1), "Food", 10.0),
+            Expense(date(2025, 11, 1), "Rent", 500.0),
+            Expense(date(2025, 11, 2), "Food", 5.0),
+        ]
+        storage.save_expenses(path, expenses)
+        self.memory = ExpenseTracker(expenses)
+        self.sql = SqlExpenseTracker(path)
+
+    def tearDown(self):
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def test_aggregates_match_in_memory_tracker(self):
+        self.assertAlmostEqual(self.sql.total_expense(), self.memory.total_expense())
+        self.assertEqual(self.sql.total_by_category(), self.memory.total_by_category())
+        self.assertEqual(
+            self.sql.highest_and_lowest_category(), self.memory.highest_and_lowest_category()
+        )
+        self.assertEqual(list(self.sql.trend_by_date().items()), list(self.memory.trend_by_date().items()))
+        self.assertEqual(list(self.sql.total_by_month().items()), list(self.memory.total_by_month().items()))
+
+    def test_filtered_aggregates_match_in_memory_tracker(self):
+        for filters in (
+            ExpenseFilter(start=date(2025, 11, 1)),
+            ExpenseFilter(end=date(2025, 10, 31), categories=frozenset({"Food"})),
+            ExpenseFilter(categories=frozenset({"Rent", "Travel"})),
+        ):
+            self.assertAlmostEqual(self.sql.total_expense(filters), self.memory.total_expense(filters))
+            self.assertEqual(self.sql.total_by_category(filters), self.memory.total_by_category(filters))
+            self.assertEqual(self.sql.trend_by_date(filters), self.memory.trend_by_date(filters))
+            self.assertEqual(self.sql.total_by_month(filters), self.memory.total_by_month(filters))
+
+    def test_empty_database(self):
+        storage.save_expenses(self.sql.path, [])
+        self.assertEqual(self.sql.total_expense(), 0.0)
+        self.assertEqual(self.sql.highest_and_lowest_category(), (None, None))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,260 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+from src import storage, web_app
+from src.models import Expense
+
+
+class WebAppTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = Path(self.tmp.name) / "expenses.csv"
+        self.original_data_file = web_app.DATA_FILE
+        web_app.DATA_FILE = self.data_file
+        storage.save_expenses(
+            str(self.data_file),
+            [
+                Expense(date(2025, 11, 1), "Food", 10.0, "Lunch", id="a"),
+                Expense(date(2025, 11, 2), "Housing", 500.0, "Rent", id="b"),
+            ],
+        )
+        self.client = web_app.app.test_client()
+
+    def tearDown(self):
+        web_app.DATA_FILE = self.original_data_file
+        tracker = web_app._summary_trackers.pop(str(self.data_file), None)
+        if tracker is not None:
+            tracker.close()
+        storage.close_connections()
+        self.tmp.cleanup()
+
+    def test_index_lists_expenses(self):
+        response = self.client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Lunch", response.data)
+        self.assertIn(b"510.00", response.data)
+
+    def test_index_paginates_expenses(self):
+        response = self.client.get("/?limit=1")
+        self.assertIn(b"Rent", response.data)
+        self.assertNotIn(b"Lunch", response.data)
+        self.assertIn(b"cursor=2025-11-02", response.data)
+
+        response = self.client.get("/?limit=1&cursor=2025-11-02:b")
+        self.assertIn(b"Lunch", response.data)
+        self.assertNotIn(b"Older", response.data)
+
+    def test_index_rejects_bad_cursor(self):
+        self.assertEqual(self.client.get("/?cursor=garbage").status_code, 400)
+
+    def test_index_searches_descriptions(self):
+        response = self.client.get("/?q=ren")
+        self.assertIn("Expenses matching “ren”".encode(), response.data)
+        self.assertIn(b"Rent", response.data)
+        self.assertNotIn(b"Lunch", response.data)
+        self.assertIn(b"510.00", response.data)
+
+        response = self.client.get("/?q=food&limit=1")
+        self.assertNotIn(b"More", response.data)
+        self.assertIn(b"No expenses match", self.client.get("/?q=nothing").data)
+
+    def test_api_expenses_search(self):
+        page = self.client.get("/api/expenses?q=lunch").json
+        self.assertEqual([e["id"] for e in page["expenses"]], ["a"])
+        self.assertEqual(self.client.get("/api/expenses?q=lunch&cursor=x").status_code, 400)
+
+    def test_export_csv_streams_filtered_rows(self):
+        response = self.client.get("/export.csv?from=2025-11-02")
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines, ["id,date,category,description,amount", "b,2025-11-02,Housing,Rent,500.00"])
+
+    def test_export_ndjson_filters_by_category(self):
+        response = self.client.get("/export.ndjson?category=Food&category=Travel")
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([row["id"] for row in rows], ["a"])
+        self.assertEqual(rows[0]["amount"], 10.0)
+
+    def test_export_rejects_bad_date(self):
+        self.assertEqual(self.client.get("/export.csv?to=yesterday").status_code, 400)
+
+    def test_api_summary_supports_conditional_requests(self):
+        response = self.client.get("/api/summary")
+        self.assertEqual(response.json["total"], 510.0)
+        self.assertEqual(response.json["highest"], {"category": "Housing", "total": 500.0})
+        etag = response.headers["ETag"]
+
+        cached = self.client.get("/api/summary", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+
+        self.client.post("/expense/a/delete")
+        fresh = self.client.get("/api/summary", headers={"If-None-Match": etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh.headers["ETag"], etag)
+        self.assertEqual(fresh.json["total"], 500.0)
+
+    def test_etag_changes_when_database_is_recreated(self):
+        etag = self.client.get("/api/summary").headers["ETag"]
+        storage.flush_csv_exports()
+        storage.close_connections()
+        for path in Path(self.tmp.name).iterdir():
+            path.unlink()
+        storage.save_expenses(str(self.data_file), [Expense(date(2025, 11, 3), "Food", 4.0, id="c")])
+
+        fresh = self.client.get("/api/summary", headers={"If-None-Match": etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json["total"], 4.0)
+
+    def test_api_trends_and_expenses(self):
+        self.assertEqual(self.client.get("/api/trend/monthly").json, {"labels": ["2025-11"], "totals": [510.0]})
+        daily = self.client.get("/api/trend/daily").json
+        self.assertEqual(daily["labels"], ["2025-11-01", "2025-11-02"])
+        self.assertEqual(self.client.get("/api/categories").json["totals"]["Food"], 10.0)
+
+        page = self.client.get("/api/expenses?limit=1&category=Food").json
+        self.assertEqual([e["id"] for e in page["expenses"]], ["a"])
+        self.assertIsNone(page["next_cursor"])
+
+    def test_trends_are_downsampled(self):
+        storage.insert_expenses(
+            str(self.data_file),
+            [Expense(date(2024, 1, 1) + timedelta(days=i), "Food", 1.0 + i % 5, id=f"d{i}") for i in range(600)],
+        )
+        daily = self.client.get("/api/trend/daily?points=50").json
+        self.assertEqual(len(daily["labels"]), 50)
+        self.assertEqual(daily["labels"][-1], "2025-11-02")
+        self.assertEqual(len(self.client.get("/api/trend/monthly?points=5").json["labels"]), 5)
+        self.assertEqual(len(self.client.get("/api/trend/daily").json["labels"]), 602)
+
+        page = self.client.get("/").data.decode()
+        self.assertIn("(weekly totals)", page)
+        self.assertIn("<td>2025-10-27</td>", page)
+        self.assertIn("points=120", page)
+        page = self.client.get("/?points=50").data.decode()
+        self.assertIn("(monthly totals)", page)
+        self.assertIn("<td>2025-11</td>", page)
+        page = self.client.get("/?points=5").data.decode()
+        self.assertIn("(yearly totals)", page)
+        self.assertEqual(page.count("<td>202"), 2 + 25)  # two years, plus the first page of expenses
+
+    def test_index_applies_filters(self):
+        response = self.client.get("/?category=Food&from=2025-11-01&to=2025-11-30")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Summary (filtered)", response.data)
+        self.assertIn(b"$10.00", response.data)
+        self.assertNotIn(b"Rent", response.data)
+        self.assertIn(b"/export.csv?from=2025-11-01&amp;to=2025-11-30&amp;category=Food", response.data)
+
+    def test_add_expense(self):
+        response = self.client.post(
+            "/",
+            data={"category": "Travel", "amount": "25", "date": "2025-11-03", "description": "Taxi"},
+        )
+        self.assertEqual(response.status_code, 302)
+        expenses = storage.load_expenses(str(self.data_file))
+        self.assertEqual(len(expenses), 3)
+        self.assertIn("Taxi", [e.description for e in expenses])
+
+    def test_add_expense_rejects_unstorable_amounts(self):
+        for amount in ("inf", "nan", "1e20", "0.001"):
+            response = self.client.post("/", data={"category": "Food", "amount": amount, "date": "2025-11-03"})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b"Amount must be a positive number.", response.data)
+        self.assertEqual(storage.total_amount(str(self.data_file)), 510.0)
+
+    def test_edit_expense(self):
+        response = self.client.post(
+            "/expense/a/edit",
+            data={"category": "Food", "amount": "12.50", "date": "2025-11-01", "description": "Dinner"},
+        )
+        self.assertEqual(response.status_code, 302)
+        expense = storage.get_expense(str(self.data_file), "a")
+        self.assertEqual(expense.description, "Dinner")
+        self.assertAlmostEqual(expense.amount, 12.5)
+
+    def test_edit_missing_expense(self):
+        self.assertEqual(self.client.get("/expense/missing/edit").status_code, 404)
+
+    def test_delete_expense(self):
+        response = self.client.post("/expense/b/delete")
+        self.assertIn("status=deleted", response.headers["Location"])
+        response = self.client.post("/expense/b/delete")
+        self.assertIn("status=missing", response.headers["Location"])
+
+    def test_archived_expenses_are_read_only(self):
+        storage.archive_year(str(self.data_file), 2025)
+        self.assertIn(b"Rent", self.client.get("/").data)
+        response = self.client.post("/expense/b/delete")
+        self.assertIn("status=archived", response.headers["Location"])
+        form = {"date": "2025-11-02", "category": "Housing", "amount": "1", "description": "Rent"}
+        response = self.client.post("/expense/b/edit", data=form)
+        self.assertIn(b"archived years are read-only", response.data)
+
+    def test_edit_of_concurrently_deleted_expense(self):
+        def delete_then_update(path, expense):
+            storage.remove_expense(path, expense.id)
+            return storage.update_expense(path, expense)
+
+        form = {"date": "2025-11-02", "category": "Housing", "amount": "1", "description": "Rent"}
+        with mock.patch.object(web_app, "update_expense", delete_then_update):
+            response = self.client.post("/expense/b/edit", data=form)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("status=missing", response.headers["Location"])
+
+    def test_cli_init_and_compiled_templates(self):
+        runner = web_app.app.test_cli_runner()
+        self.assertIn("2 expenses", runner.invoke(args=["init-db"]).output)
+
+        compiled = Path(self.tmp.name) / "templates"
+        original_dir, original_loader = web_app.COMPILED_TEMPLATES_DIR, web_app.app.jinja_env.loader
+        web_app.COMPILED_TEMPLATES_DIR = compiled
+        try:
+            self.assertEqual(runner.invoke(args=["compile-templates"]).exit_code, 0)
+            self.assertTrue(web_app.use_compiled_templates(compiled))
+            web_app.app.jinja_env.cache.clear()
+            self.assertIn(b"Lunch", self.client.get("/").data)
+        finally:
+            web_app.COMPILED_TEMPLATES_DIR = original_dir
+            web_app.app.jinja_env.loader = original_loader
+            web_app.app.jinja_env.cache.clear()
+
+    def test_warm_up_fills_summary_cache(self):
+        web_app.start_warm_up().join(timeout=5)
+        tracker = web_app.summary_tracker()
+        misses = tracker.misses
+        self.client.get("/")
+        self.assertEqual(tracker.misses, misses)
+
+    def test_summary_tracker_is_created_once_across_threads(self):
+        listeners = len(storage._write_listeners)
+        built = []
+        real_tracker = web_app.CachedTracker
+
+        def slow_tracker(*args):
+            time.sleep(0.05)  # widen the window between lookup and insert
+            built.append(real_tracker(*args))
+            return built[-1]
+
+        with mock.patch.object(web_app, "CachedTracker", side_effect=slow_tracker):
+            trackers = []
+            threads = [
+                threading.Thread(target=lambda: trackers.append(web_app.summary_tracker()))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(built), 1)
+        self.assertTrue(all(tracker is built[0] for tracker in trackers))
+        self.assertEqual(len(storage._write_listeners), listeners + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()